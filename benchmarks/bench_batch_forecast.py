@@ -0,0 +1,69 @@
+"""批量预测基准：对比逐个序列拟合与 forecast_all_series 的向量化拟合，并校验两者结果一致。
+
+用法: python benchmarks/bench_batch_forecast.py [--rows 2000000] [--users 300] [--days 365] [--horizon 7]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from common import load_gui
+from workload import fill_database
+
+
+def per_series_forecast(user_ids, subjects, matrix, observed, horizon):
+    # 对照：每个序列单独取出有记录的天并用 np.polyfit 拟合
+    forecasts = np.zeros((len(user_ids), horizon))
+    future = np.arange(matrix.shape[1], matrix.shape[1] + horizon)
+    for i in range(len(user_ids)):
+        x = np.flatnonzero(observed[i])
+        y = matrix[i, x]
+        if len(x) < 2:
+            forecasts[i] = y.mean()
+            continue
+        slope, intercept = np.polyfit(x, y, 1)
+        forecasts[i] = np.maximum(intercept + slope * future, 0.0)
+    return forecasts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--users", type=int, default=300)
+    parser.add_argument("--days", type=int, default=365, help="合成数据覆盖的天数")
+    parser.add_argument("--horizon", type=int, default=7)
+    args = parser.parse_args()
+
+    gui = load_gui()
+    with tempfile.TemporaryDirectory() as tmp:
+        gui.DB_PATH = os.path.join(tmp, "bench_study_tracker.db")
+        gui.initialize_database()
+        fill_database(gui.DB_PATH, gui.DatabaseWriter.INSERT_SQL, args.rows, args.users, args.days)
+        gui.rebuild_rollups()
+
+        start = time.perf_counter()
+        user_ids, subjects, first_day, matrix, observed = gui.load_daily_matrix()
+        load_seconds = time.perf_counter() - start
+        print(f"读取并组装矩阵: {len(user_ids)} 个序列 x {matrix.shape[1]} 天，耗时 {load_seconds * 1000:.1f} ms")
+
+        start = time.perf_counter()
+        expected = per_series_forecast(user_ids, subjects, matrix, observed, args.horizon)
+        loop_seconds = time.perf_counter() - start
+        print(f"逐个序列拟合:     {loop_seconds * 1000:10.1f} ms")
+
+        start = time.perf_counter()
+        result = gui.forecast_all_series(args.horizon)
+        total_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        gui.fit_linear_trends(matrix, observed)
+        fit_seconds = time.perf_counter() - start
+        print(f"向量化拟合:       {fit_seconds * 1000:10.1f} ms（含查询的 forecast_all_series: {total_seconds * 1000:.1f} ms）")
+
+        error = np.abs(result.forecasts - expected).max() if len(expected) else 0.0
+        print(f"最大偏差: {error:.2e}，从 {result.start_date:%Y-%m-%d} 起预测 {args.horizon} 天")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""CLI 学习日志存储格式基准：比较 CSV 与列式存储的体积、加载与报表聚合耗时。
+
+用法: python benchmarks/bench_columnar_log.py [--rows 1000000]
+"""
+import argparse
+import os
+import tempfile
+
+from common import load_cli, timed
+from workload import synthetic_sessions
+
+
+def directory_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    cli = load_cli()
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_writer = cli.StudyLogWriter(os.path.join(tmp, "study_log.csv"), flush_size=50_000)
+        columnar = cli.ColumnarStudyLog(os.path.join(tmp, "columns"), flush_size=50_000)
+        csv_writer.ensure_header()
+        columnar.ensure_header()
+        for session in synthetic_sessions(args.rows):
+            csv_writer.append_session(*session)
+            columnar.append_session(*session)
+        csv_writer.flush()
+        columnar.flush()
+
+        cli.LOG_FILE = csv_writer.path
+        csv_size = directory_size(csv_writer.path)
+        columnar_size = directory_size(columnar.directory)
+        csv_load, _ = timed(cli.pd.read_csv, csv_writer.path)
+        columnar_load, _ = timed(columnar.frame, cli.LOG_COLUMNS[:3])
+
+        print(f"行数: {args.rows}")
+        print(f"{'':<22}{'CSV':>12}{'列式':>12}")
+        print(f"{'磁盘占用 (MB)':<22}{csv_size / 2**20:12.1f}{columnar_size / 2**20:12.1f}")
+        print(f"{'加载 (s)':<22}{csv_load:12.3f}{columnar_load:12.3f}")
+        for keys in (["日期", "学科"], ["周", "日期", "学科"], ["学科"]):
+            cli.log_writer = csv_writer
+            csv_time, _ = timed(cli.aggregate_log, keys)
+            cli.log_writer = columnar
+            columnar_time, _ = timed(cli.aggregate_log, keys)
+            print(f"{'聚合 ' + '/'.join(keys) + ' (s)':<22}{csv_time:12.3f}{columnar_time:12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""CLI 学习日志写入基准：比较只追加写入与旧的“读全量-拼接-重写”方式。
+
+用法: python benchmarks/bench_csv_log_writer.py [--sizes 10000 100000 1000000] [--writes 200]
+"""
+import argparse
+import csv
+import os
+import tempfile
+import time
+
+from common import load_cli, timed
+
+SAMPLE_ROW = [
+    "第三章 线性代数.pdf", "数学", 23.5, "已完成",
+    "2024-03-01 09:00:00", "2024-03-01 09:23:30", "2024-03-01", "2024-08", "2024-03",
+    "2024-03-01 09:23:30"
+]
+
+
+def build_log(cli, path, rows):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(cli.LOG_COLUMNS)
+        for _ in range(rows):
+            writer.writerow(SAMPLE_ROW)
+        f.flush()
+        os.fsync(f.fileno())  # 避免首次追加时的 fsync 把构建日志的脏页也算进去
+
+
+def bench_append_writer(cli, path, writes, flush_size):
+    writer = cli.StudyLogWriter(path, flush_size=flush_size, flush_interval=3600)
+    start = time.perf_counter()
+    for _ in range(writes):
+        writer.append(SAMPLE_ROW)
+    writer.flush()
+    return (time.perf_counter() - start) / writes
+
+
+def bench_rewrite(cli, path, writes):
+    pd = cli.pd
+    start = time.perf_counter()
+    for _ in range(writes):
+        df = pd.read_csv(path)
+        df = pd.concat([df, pd.DataFrame([SAMPLE_ROW], columns=cli.LOG_COLUMNS)], ignore_index=True)
+        df.to_csv(path, index=False)
+    return (time.perf_counter() - start) / writes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--writes", type=int, default=200, help="每个规模下写入的会话数")
+    parser.add_argument("--flush-size", type=int, default=20)
+    parser.add_argument("--rewrite-limit", type=int, default=100_000,
+                        help="旧写入方式只在日志行数不超过该值时测量（否则耗时过长）")
+    args = parser.parse_args()
+
+    cli = load_cli()
+    print(f"{'已有行数':>10} {'追加写入(ms/条)':>16} {'旧方式(ms/条)':>14}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            path = os.path.join(tmp, f"study_log_{size}.csv")
+            build_time, _ = timed(build_log, cli, path, size)
+            append_cost = bench_append_writer(cli, path, args.writes, args.flush_size)
+            rewrite_cost = None
+            if size <= args.rewrite_limit:
+                build_log(cli, path, size)
+                rewrite_cost = bench_rewrite(cli, path, max(1, args.writes // 20))
+            rewrite_text = f"{rewrite_cost * 1000:14.3f}" if rewrite_cost is not None else f"{'-':>14}"
+            print(f"{size:>10} {append_cost * 1000:16.3f} {rewrite_text}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""跟踪状态内存基准：比较旧的“完整路径字符串 + float 字典”布局与 FileRegistry 的驻留布局。
+
+旧布局: 扫描器目录索引中的路径列表 + 根目录 {路径: atime} + 跟踪器 all_files 字典；会话为普通 dict。
+新布局: IncrementalScanner 目录索引 + FileRegistry（目录 ID、文件名、array 存放的 atime）；会话为 StudySession。
+
+用法: python benchmarks/bench_file_registry_memory.py [--files 200000] [--depth 3] [--fanout 5] [--sessions 1000]
+"""
+import argparse
+import gc
+import os
+import tempfile
+import time
+import tracemalloc
+
+from common import load_gui
+from workload import build_tree
+import studtScan  # common 已把仓库目录加入 sys.path
+
+
+def legacy_state(root, extensions):
+    dir_index, root_files = {}, {}
+    pending = [root]
+    while pending:
+        path = pending.pop()
+        subdirs, files = [], []
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif entry.name.endswith(extensions):
+                    root_files[entry.path] = entry.stat().st_atime
+                    files.append(entry.path)
+        dir_index[path] = (os.stat(path).st_mtime_ns, subdirs, files)
+        pending.extend(subdirs)
+    # 跟踪器的 all_files 与根目录字典共享路径和 float 对象
+    return dir_index, root_files, dict(root_files)
+
+
+def registry_state(root, extensions):
+    scanner = studtScan.IncrementalScanner(root, extensions)
+    scanner.diff()
+    return scanner
+
+
+def legacy_sessions(count):
+    now = time.time()
+    return [{"start_time": now, "last_fluctuation": now} for _ in range(count)]
+
+
+def registry_sessions(count):
+    # 文件名与学科取自注册表，会话只保存引用
+    now = time.time()
+    return [studtScan.StudySession("课件.pdf", "数学", now) for _ in range(count)]
+
+
+def traced(build, *args):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        state = build(*args)
+        gc.collect()
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return size, state
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=200_000)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--fanout", type=int, default=5)
+    parser.add_argument("--sessions", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        gui = load_gui()
+        extensions = tuple(gui.SUPPORTED_EXTENSIONS)
+        root = os.path.join(tmp, "课件")
+        print(f"生成课件树: {args.files} 个文件...")
+        files = len(build_tree(root, args.files, args.depth, args.fanout, extensions))
+
+        legacy_bytes, legacy = traced(legacy_state, root, extensions)
+        registry_bytes, scanner = traced(registry_state, root, extensions)
+        assert len(scanner.registry) == len(legacy[2]) == files
+        legacy_session_bytes, _ = traced(legacy_sessions, args.sessions)
+        registry_session_bytes, _ = traced(registry_sessions, args.sessions)
+
+        print(f"\n{'':<14}{'旧布局':>12}{'FileRegistry':>14}{'压缩比':>8}")
+        print(f"{'每个文件 (B)':<14}{legacy_bytes / files:>12.1f}{registry_bytes / files:>14.1f}"
+              f"{legacy_bytes / registry_bytes:>8.1f}x")
+        print(f"{'每个会话 (B)':<14}{legacy_session_bytes / args.sessions:>12.1f}"
+              f"{registry_session_bytes / args.sessions:>14.1f}{legacy_session_bytes / registry_session_bytes:>8.1f}x")
+        print(f"{'总计 (MB)':<14}{legacy_bytes / 2 ** 20:>12.1f}{registry_bytes / 2 ** 20:>14.1f}")
+        os.chdir(os.path.dirname(tmp))
+
+
+if __name__ == "__main__":
+    main()
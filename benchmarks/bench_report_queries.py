@@ -0,0 +1,63 @@
+"""study_logs 报表查询基准：在合成数据库上对比迁移前后（覆盖索引、汇总表）的查询计划与耗时。
+
+用法: python benchmarks/bench_report_queries.py [--rows 10000000] [--users 200] [--db 路径]
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+from common import load_gui
+from workload import fill_database
+
+
+def build_database(gui, path, rows, users, days):
+    gui.DB_PATH = path
+    # 先建表但不执行迁移，以便测量无索引时的基线
+    migrations, gui.SCHEMA_MIGRATIONS = gui.SCHEMA_MIGRATIONS, []
+    try:
+        gui.initialize_database()
+    finally:
+        gui.SCHEMA_MIGRATIONS = migrations
+    fill_database(path, gui.DatabaseWriter.INSERT_SQL, rows, users, days)
+    return sqlite3.connect(path)
+
+
+def run_queries(conn, queries, user_id, label):
+    print(f"\n--- {label} ---")
+    for name, sql in queries.items():
+        plan = conn.execute("EXPLAIN QUERY PLAN " + sql, (user_id,)).fetchall()
+        start = time.perf_counter()
+        result_rows = len(conn.execute(sql, (user_id,)).fetchall())
+        elapsed = time.perf_counter() - start
+        print(f"{name:<12} {elapsed * 1000:10.1f} ms  {result_rows:>7} 行")
+        for step in plan:
+            print(f"{'':<14}{step[-1]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--days", type=int, default=5 * 365, help="合成数据覆盖的天数")
+    parser.add_argument("--user-id", type=int, default=1, help="被查询的用户")
+    parser.add_argument("--db", help="合成数据库路径（默认使用临时目录，结束后删除）")
+    args = parser.parse_args()
+
+    gui = load_gui()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.db or os.path.join(tmp, "bench_study_tracker.db")
+        conn = build_database(gui, path, args.rows, args.users, args.days)
+        run_queries(conn, gui.RAW_REPORT_QUERIES, args.user_id, "迁移前：直接聚合 study_logs（无索引）")
+
+        start = time.perf_counter()
+        gui.migrate_database(conn)
+        print(f"\n执行迁移（覆盖索引 + 汇总表）耗时 {time.perf_counter() - start:.1f} 秒")
+        run_queries(conn, gui.RAW_REPORT_QUERIES, args.user_id, "迁移后：直接聚合 study_logs（覆盖索引）")
+        run_queries(conn, gui.REPORT_QUERIES, args.user_id, "迁移后：读取 study_rollups 汇总表")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
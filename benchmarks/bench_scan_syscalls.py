@@ -0,0 +1,112 @@
+"""扫描周期系统调用基准：比较旧的“扫描后逐个 getatime”流程与单次 stat 的 diff 流程。
+
+通过包装 os.stat / os.scandir / DirEntry.stat 计数 Python 层的 stat 调用，
+在 Linux 上每次调用对应一次 stat 类系统调用（DirEntry.is_dir 使用 d_type，不产生额外调用）。
+
+用法: python benchmarks/bench_scan_syscalls.py [--files 20000] [--ticks 10]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from common import load_gui
+from workload import build_tree
+import studtScan  # common 已把仓库目录加入 sys.path
+
+
+class StatCounter:
+    def __init__(self):
+        self.calls = 0
+        self.real_stat = os.stat
+        self.real_scandir = os.scandir
+
+    def __enter__(self):
+        counter = self
+
+        class CountingEntry:
+            __slots__ = ("entry",)
+
+            def __init__(self, entry):
+                self.entry = entry
+
+            def __getattr__(self, name):
+                return getattr(self.entry, name)
+
+            def stat(self, *args, **kwargs):
+                counter.calls += 1
+                return self.entry.stat(*args, **kwargs)
+
+        class CountingScandir:
+            def __init__(self, path):
+                self.iterator = counter.real_scandir(path)
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                self.iterator.close()
+
+            def __iter__(self):
+                return (CountingEntry(entry) for entry in self.iterator)
+
+        def counting_stat(*args, **kwargs):
+            counter.calls += 1
+            return counter.real_stat(*args, **kwargs)
+
+        os.stat = counting_stat  # os.path.getatime 内部也经过 os.stat
+        os.scandir = CountingScandir
+        return self
+
+    def __exit__(self, *exc):
+        os.stat = self.real_stat
+        os.scandir = self.real_scandir
+
+
+def legacy_tick(scanner):
+    """旧流程：扫描得到全部文件后，再对每个文件调用一次 getatime。"""
+    registry = scanner.registry
+    _, changed, removed = scanner.diff()
+    for dir_files in registry.dir_files:
+        for file_id in dir_files:
+            os.path.getatime(registry.path(file_id))
+    return len(changed) + len(removed)
+
+
+def diff_tick(scanner):
+    _, changed, removed = scanner.diff()
+    return len(changed) + len(removed)
+
+
+def measure(root, extensions, tick, ticks):
+    scanner = studtScan.IncrementalScanner(root, extensions)
+    scanner.diff()
+    with StatCounter() as counter:
+        start = time.perf_counter()
+        for _ in range(ticks):
+            tick(scanner)
+        elapsed = time.perf_counter() - start
+    return counter.calls / ticks, elapsed / ticks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=20_000)
+    parser.add_argument("--ticks", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        gui = load_gui()
+        root = os.path.join(tmp, "课件")
+        build_tree(root, args.files, extensions=gui.SUPPORTED_EXTENSIONS)
+
+        print(f"{'流程':<12}{'stat 调用/周期':>16}{'耗时/周期 (ms)':>18}")
+        for label, tick in (("扫描+getatime", legacy_tick), ("单次 stat diff", diff_tick)):
+            calls, seconds = measure(root, gui.SUPPORTED_EXTENSIONS, tick, args.ticks)
+            print(f"{label:<12}{calls:>16.0f}{seconds * 1000:>18.2f}")
+        os.chdir(os.path.dirname(tmp))
+
+
+if __name__ == "__main__":
+    main()
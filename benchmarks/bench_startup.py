@@ -0,0 +1,105 @@
+"""GUI 启动基准：测量从解释器启动到登录窗口显示的时间，并防止重量级依赖回到启动路径。
+
+在子进程中以 `python -X importtime` 加载 studtRecord.py、创建并显示登录窗口，
+汇总导入耗时最多的模块。超出 --max-seconds 或启动时已导入 HEAVY_MODULES 中的模块时返回非零退出码。
+
+用法: python benchmarks/bench_startup.py [--runs 5] [--max-seconds 1.5] [--json 结果.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from common import GUI_SCRIPT
+
+# 这些模块只应在首次使用时加载
+HEAVY_MODULES = ["pandas", "numpy", "matplotlib", "sklearn", "plyer"]
+
+CHILD_SCRIPT = r"""
+import importlib.util, json, os, sys, time
+start = time.perf_counter()
+sys.path.insert(0, os.path.dirname(os.path.abspath(sys.argv[1])))
+spec = importlib.util.spec_from_file_location("studtRecord", sys.argv[1])
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+app = module.QApplication(sys.argv[:1])
+window = module.StudyTrackerApp()
+window.show()
+app.processEvents()
+elapsed = time.perf_counter() - start
+heavy = [name for name in json.loads(sys.argv[2]) if name in sys.modules]
+print(json.dumps({"time_to_first_window": elapsed, "heavy_modules_loaded": heavy}))
+"""
+
+
+def parse_importtime(stderr):
+    # 行格式: "import time: <自身耗时us> | <累计耗时us> | <缩进表示嵌套层级的模块名>"
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        name = name[1:]
+        # 只保留顶层导入，避免嵌套模块被重复计算
+        if name.startswith(" "):
+            continue
+        entries.append((int(cumulative_us), int(self_us), name))
+    return sorted(entries, reverse=True)
+
+
+def run_once(workdir):
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD_SCRIPT, GUI_SCRIPT, json.dumps(HEAVY_MODULES)],
+        capture_output=True, text=True, cwd=workdir, env=env, check=True)
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["imports"] = parse_importtime(proc.stderr)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-seconds", type=float, default=None, help="首个窗口显示时间的上限（取中位数）")
+    parser.add_argument("--top", type=int, default=10, help="列出导入耗时最多的模块数")
+    parser.add_argument("--json", help="把结果写入 JSON 文件")
+    args = parser.parse_args()
+
+    # 在临时工作目录中运行，避免生成的日志文件落在仓库里
+    with tempfile.TemporaryDirectory() as workdir:
+        results = [run_once(workdir) for _ in range(args.runs)]
+
+    times = [r["time_to_first_window"] for r in results]
+    median = statistics.median(times)
+    heavy = sorted({name for r in results for name in r["heavy_modules_loaded"]})
+    print(f"首个窗口显示时间: 中位数 {median:.3f} 秒, 最小 {min(times):.3f} 秒, 最大 {max(times):.3f} 秒")
+    print("\n导入耗时最多的模块（最后一次运行）:")
+    for cumulative_us, _, name in results[-1]["imports"][:args.top]:
+        print(f"{cumulative_us / 1000:10.1f} ms  {name}")
+
+    failures = []
+    if heavy:
+        failures.append(f"启动时已加载重量级模块: {', '.join(heavy)}")
+    if args.max_seconds is not None and median > args.max_seconds:
+        failures.append(f"首个窗口显示时间 {median:.3f} 秒超过上限 {args.max_seconds:.3f} 秒")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({
+                "time_to_first_window": {"median": median, "min": min(times), "max": max(times), "runs": times},
+                "heavy_modules_loaded": heavy,
+                "top_imports_ms": {name: us / 1000 for us, _, name in results[-1]["imports"][:args.top]},
+                "failures": failures,
+            }, f, ensure_ascii=False, indent=2)
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""基准测试公共工具：按文件路径加载两个主程序脚本。"""
+import importlib.util
+import os
+import sys
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GUI_SCRIPT = os.path.join(REPO_DIR, "studtRecord.py")
+CLI_SCRIPT = os.path.join(REPO_DIR, "studtRecord——CMD.py")
+# 两个主程序都会导入同目录下的 studtScan
+sys.path.insert(0, REPO_DIR)
+
+
+def load_module(path, name):
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_gui():
+    return load_module(GUI_SCRIPT, "studtRecord")
+
+
+def load_cli():
+    # 文件名中含有全角破折号，无法直接 import
+    return load_module(CLI_SCRIPT, "studtRecord_cmd")
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
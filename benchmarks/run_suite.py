@@ -0,0 +1,243 @@
+"""端到端基准套件：在合成课件树与合成历史上测量两个跟踪器，结果写入 JSON 以便跟踪回归。
+
+测量项:
+  scan       共享增量扫描器每个扫描周期的耗时（首次冷扫描与稳定状态，两个跟踪器使用同一实现）
+  detection  从打开课件到出现在 active_sessions 中的延迟（GUI 的轮询与 inotify 后端、CLI 跟踪器）
+  insert     学习记录写入吞吐（GUI DatabaseWriter，CLI 的 CSV 与列式写入器）
+  report     报表查询/聚合延迟（GUI REPORT_QUERIES，CLI aggregate_log）
+
+用法: python benchmarks/run_suite.py [--files 20000] [--depth 3] [--fanout 5] [--history-rows 200000]
+                                     [--output bench_results.json]
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from common import load_cli, load_gui, timed
+from workload import access_pattern, build_tree, fill_cli_log, fill_database, simulate_access, synthetic_log_rows
+import studtScan  # common 已把仓库目录加入 sys.path
+
+CLI_REPORT_KEYS = {
+    "daily": ["日期", "学科"],
+    "weekly": ["周", "日期", "学科"],
+    "monthly": ["月", "日期", "学科"],
+    "subject": ["学科"],
+}
+
+
+def summarize(samples):
+    return {
+        "samples": len(samples),
+        "mean": statistics.fmean(samples),
+        "median": statistics.median(samples),
+        "min": min(samples),
+        "max": max(samples),
+    }
+
+
+# ==================== 扫描 ====================
+def bench_scan(root, extensions, ticks):
+    scanner = studtScan.IncrementalScanner(root, extensions)
+    cold, _ = timed(scanner.diff)
+    steady = [timed(scanner.diff)[0] for _ in range(ticks)]
+    return {"files": len(scanner.registry), "cold_seconds": cold, "tick_seconds": summarize(steady)}
+
+
+# ==================== 会话检测延迟 ====================
+def wait_for_session(sessions, lock, path, timeout):
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        with lock:
+            if path in sessions:
+                return time.perf_counter() - start
+        time.sleep(0.001)
+    return None
+
+
+def measure_detection(sessions, lock, targets, timeout):
+    latencies, missed = [], 0
+    for path in targets:
+        simulate_access(path)
+        latency = wait_for_session(sessions, lock, path, timeout)
+        if latency is None:
+            missed += 1
+        else:
+            latencies.append(latency)
+    result = {"missed": missed}
+    if latencies:
+        result["latency_seconds"] = summarize(latencies)
+    return result
+
+
+def bench_gui_detection(gui, root, targets, backend, timeout):
+    gui.ROOT_DIRS = [root]
+    gui.WATCHER_BACKEND = backend
+    stop_event = threading.Event()
+    tracker = gui.StudyTracker(1, stop_event, lambda *args: None, lambda *args: None)
+    tracker.start()
+    time.sleep(0.5)  # 等待监视器就绪
+    try:
+        return measure_detection(tracker.active_sessions, tracker.active_sessions_lock, targets, timeout)
+    finally:
+        stop_event.set()
+        tracker.join()
+        tracker.db_writer.close()
+
+
+def bench_cli_detection(cli, root, targets, timeout):
+    cli.ROOT_DIRS = [root]
+    stop_event = threading.Event()
+    lock = threading.Lock()
+    sessions = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        thread = threading.Thread(target=cli.track_study_time, args=(stop_event, lock, sessions), daemon=True)
+        thread.start()
+        time.sleep(0.5)
+        try:
+            return measure_detection(sessions, lock, targets, timeout)
+        finally:
+            stop_event.set()
+            thread.join()
+
+
+# ==================== 写入吞吐 ====================
+def bench_gui_insert(gui, path, rows):
+    gui.DB_PATH = path
+    gui.initialize_database()
+    writer = gui.DatabaseWriter(path)
+    writer.start()
+    start = time.perf_counter()
+    for row in synthetic_log_rows(rows, users=10, days=365, seed=1):
+        writer.submit(row)
+    writer.flush()
+    elapsed = time.perf_counter() - start
+    writer.close()
+    return {"rows": rows, "seconds": elapsed, "rows_per_second": rows / elapsed,
+            "transactions": writer.committed_batches}
+
+
+def bench_cli_insert(writer, rows):
+    elapsed, _ = timed(fill_cli_log, writer, rows, 1)
+    return {"rows": rows, "seconds": elapsed, "rows_per_second": rows / elapsed}
+
+
+# ==================== 报表延迟 ====================
+def bench_gui_reports(gui, path, repeats):
+    conn = sqlite3.connect(path)
+    try:
+        results = {}
+        for name, sql in gui.REPORT_QUERIES.items():
+            samples = [timed(lambda: conn.execute(sql, (1,)).fetchall())[0] for _ in range(repeats)]
+            results[name] = summarize(samples)
+        return results
+    finally:
+        conn.close()
+
+
+def bench_cli_reports(cli, writer, repeats):
+    cli.log_writer = writer
+    cli.LOG_FILE = writer.path
+    return {name: summarize([timed(cli.aggregate_log, keys)[0] for _ in range(repeats)])
+            for name, keys in CLI_REPORT_KEYS.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=20_000, help="课件树中的文件数")
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--fanout", type=int, default=5)
+    parser.add_argument("--ticks", type=int, default=5, help="稳定状态下测量的扫描周期数")
+    parser.add_argument("--detections", type=int, default=5, help="每个跟踪器测量的会话检测次数")
+    parser.add_argument("--check-interval", type=float, default=None, help="覆盖两个跟踪器的 CHECK_INTERVAL")
+    parser.add_argument("--insert-rows", type=int, default=20_000)
+    parser.add_argument("--history-rows", type=int, default=200_000, help="报表基准使用的历史记录数")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--skip", nargs="*", default=[], choices=["scan", "detection", "insert", "report"])
+    parser.add_argument("--output", default="bench_results.json")
+    args = parser.parse_args()
+    output = os.path.abspath(args.output)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)  # 两个脚本会在当前目录创建日志/数据库文件
+        gui = load_gui()
+        cli = load_cli()
+        logging.getLogger().setLevel(logging.WARNING)
+        gui.DB_PATH = os.path.join(tmp, "study_tracker.db")
+        gui.initialize_database()
+        cli.log_writer = cli.StudyLogWriter(os.path.join(tmp, "tracker_log.csv"))
+        if args.check_interval is not None:
+            gui.CHECK_INTERVAL = cli.CHECK_INTERVAL = args.check_interval
+
+        root = os.path.join(tmp, "课件")
+        print(f"生成课件树: {args.files} 个文件，深度 {args.depth}，每层 {args.fanout} 个子目录")
+        supported = build_tree(root, args.files, args.depth, args.fanout, gui.SUPPORTED_EXTENSIONS)
+        results = {
+            "meta": {
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "python": sys.version.split()[0],
+                "platform": platform.platform(),
+                "params": vars(args),
+            },
+        }
+
+        if "scan" not in args.skip:
+            print("测量扫描耗时...")
+            results["scan"] = {"scanner": bench_scan(root, gui.SUPPORTED_EXTENSIONS, args.ticks)}
+
+        if "detection" not in args.skip:
+            targets = list(dict.fromkeys(access_pattern(supported, args.detections * 20, seed=2)))
+            timeout = max(gui.CHECK_INTERVAL, cli.CHECK_INTERVAL) * 3 + 5
+            chunks = [targets[i::3][:args.detections] for i in range(3)]
+            print("测量会话检测延迟...")
+            results["detection"] = {
+                "gui_polling": bench_gui_detection(gui, root, chunks[0], "polling", timeout),
+                "gui_inotify": (bench_gui_detection(gui, root, chunks[1], "inotify", timeout)
+                                if sys.platform.startswith("linux") else None),
+                "cli": bench_cli_detection(cli, root, chunks[2], timeout),
+            }
+
+        if "insert" not in args.skip:
+            print("测量写入吞吐...")
+            results["insert"] = {
+                "gui_database_writer": bench_gui_insert(gui, os.path.join(tmp, "insert.db"), args.insert_rows),
+                "cli_csv": bench_cli_insert(cli.StudyLogWriter(os.path.join(tmp, "insert.csv"), flush_size=1000),
+                                            args.insert_rows),
+                "cli_columnar": bench_cli_insert(cli.ColumnarStudyLog(os.path.join(tmp, "insert_columns"),
+                                                                      flush_size=1000), args.insert_rows),
+            }
+
+        if "report" not in args.skip:
+            print(f"生成 {args.history_rows} 条历史记录并测量报表延迟...")
+            gui.DB_PATH = os.path.join(tmp, "history.db")
+            gui.initialize_database()
+            fill_database(gui.DB_PATH, gui.DatabaseWriter.INSERT_SQL, args.history_rows, users=20, days=3 * 365)
+            gui.rebuild_rollups()
+            csv_writer = cli.StudyLogWriter(os.path.join(tmp, "history.csv"), flush_size=50_000)
+            columnar = cli.ColumnarStudyLog(os.path.join(tmp, "history_columns"), flush_size=50_000)
+            fill_cli_log(csv_writer, args.history_rows)
+            fill_cli_log(columnar, args.history_rows)
+            results["report"] = {
+                "gui": bench_gui_reports(gui, gui.DB_PATH, args.repeats),
+                "cli_csv": bench_cli_reports(cli, csv_writer, args.repeats),
+                "cli_columnar": bench_cli_reports(cli, columnar, args.repeats),
+            }
+        os.chdir(os.path.dirname(output) or ".")
+
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"✅ 结果已写入 {output}")
+
+
+if __name__ == "__main__":
+    main()
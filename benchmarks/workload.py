@@ -0,0 +1,122 @@
+"""合成工作负载：课件目录树、文件访问模式与学习记录历史。"""
+import datetime
+import os
+import random
+import sqlite3
+import time
+
+SUBJECTS = ["数学", "英语", "物理", "化学", "生物", "历史", "地理", "政治", "语文", "计算机"]
+DEFAULT_EXTENSIONS = [".pdf", ".docx", ".pptx"]
+UNSUPPORTED_EXTENSIONS = [".txt", ".png", ".zip"]
+INSERT_CHUNK_SIZE = 100_000
+
+
+# ==================== 目录树 ====================
+def build_tree(root, files, depth=3, fanout=5, extensions=None, unsupported_ratio=0.1, seed=0):
+    """生成 depth 层、每层 fanout 个子目录的课件树，把 files 个文件均匀分到叶子目录；返回受支持的文件路径。"""
+    rng = random.Random(seed)
+    extensions = extensions or DEFAULT_EXTENSIONS
+    leaves = [root]
+    for level in range(depth):
+        next_leaves = []
+        for parent in leaves:
+            for i in range(fanout):
+                if level == depth - 1:
+                    # 最后一层用学科名，study_record 按父目录推断学科
+                    suffix = str(i // len(SUBJECTS)) if i >= len(SUBJECTS) else ""
+                    name = SUBJECTS[i % len(SUBJECTS)] + suffix
+                else:
+                    name = f"第{level + 1}级_{i}"
+                next_leaves.append(os.path.join(parent, name))
+        leaves = next_leaves
+    for leaf in leaves:
+        os.makedirs(leaf, exist_ok=True)
+
+    supported = []
+    past = time.time() - 86400
+    for i in range(files):
+        leaf = leaves[i % len(leaves)]
+        if rng.random() < unsupported_ratio:
+            path = os.path.join(leaf, f"资料_{i}{rng.choice(UNSUPPORTED_EXTENSIONS)}")
+        else:
+            path = os.path.join(leaf, f"课件_{i}{extensions[i % len(extensions)]}")
+            supported.append(path)
+        with open(path, "wb") as f:
+            f.write(b"%PDF-1.4\n" if path.endswith(".pdf") else b"\0")
+        os.utime(path, (past, past))
+    # 把目录 mtime 调到过去，增量扫描器才会信任缓存
+    for dirpath, _, _ in os.walk(root):
+        os.utime(dirpath, (past, past))
+    return supported
+
+
+def simulate_access(path, read=True):
+    """模拟打开课件：推进 atime（轮询后端依赖它），并真正读取文件（inotify 后端依赖它）。"""
+    stat = os.stat(path)
+    os.utime(path, ns=(max(time.time_ns(), stat.st_atime_ns + 1_000_000_000), stat.st_mtime_ns))
+    if read:
+        with open(path, "rb") as f:
+            f.read(1)
+
+
+def access_pattern(paths, events, hot_fraction=0.05, hot_probability=0.8, seed=0):
+    """生成访问序列：大部分访问集中在少量“热门”课件上。"""
+    rng = random.Random(seed)
+    hot = paths[:max(1, int(len(paths) * hot_fraction))]
+    return [rng.choice(hot) if rng.random() < hot_probability else rng.choice(paths) for _ in range(events)]
+
+
+# ==================== 学习记录历史 ====================
+def synthetic_log_rows(rows, users, days, seed=0):
+    """study_logs 插入参数（与 DatabaseWriter.INSERT_SQL 的列顺序一致）。"""
+    rng = random.Random(seed)
+    first_day = datetime.date(2020, 1, 1)
+    for _ in range(rows):
+        day = first_day + datetime.timedelta(days=rng.randrange(days))
+        subject = rng.choice(SUBJECTS)
+        duration = round(rng.uniform(1, 90), 2)
+        date = day.strftime("%Y-%m-%d")
+        yield (
+            rng.randrange(1, users + 1), f"{subject}_{rng.randrange(500)}.pdf", subject, duration,
+            "已完成" if duration >= 15 else "进行中",
+            f"{date} 09:00:00", f"{date} 10:00:00", date, day.strftime("%U"), day.strftime("%Y-%m"),
+            f"{date} 10:00:00"
+        )
+
+
+def synthetic_sessions(rows, seed=0):
+    """CLI 日志写入器 append_session 的参数。"""
+    rng = random.Random(seed)
+    start = time.mktime((2020, 1, 1, 0, 0, 0, 0, 0, -1))
+    for _ in range(rows):
+        begin = start + rng.uniform(0, 4 * 365 * 86400)
+        end = begin + rng.uniform(60, 90 * 60)
+        subject = rng.choice(SUBJECTS)
+        yield f"{subject}_第{rng.randrange(300)}讲.pdf", subject, begin, end, datetime.datetime.fromtimestamp(end + 300)
+
+
+def fill_database(path, insert_sql, rows, users, days, seed=0, progress=True):
+    """直接批量插入合成记录（不经过 DatabaseWriter，也不更新汇总表）。"""
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("PRAGMA synchronous=OFF")
+        generator = synthetic_log_rows(rows, users, days, seed)
+        inserted = 0
+        while inserted < rows:
+            chunk = [row for _, row in zip(range(INSERT_CHUNK_SIZE), generator)]
+            with conn:
+                conn.executemany(insert_sql, chunk)
+            inserted += len(chunk)
+            if progress:
+                print(f"\r生成合成数据: {inserted}/{rows}", end="", flush=True)
+        if progress:
+            print()
+    finally:
+        conn.close()
+
+
+def fill_cli_log(writer, rows, seed=0):
+    writer.ensure_header()
+    for session in synthetic_sessions(rows, seed):
+        writer.append_session(*session)
+    writer.flush()
@@ -0,0 +1,114 @@
+"""studtRecord.py 与 studtRecord——CMD.py 共用的学习日志流式导出。
+
+数据来源由调用方提供：按块产生行元组，写入器逐块写出，内存占用与导出行数无关。
+"""
+import contextlib
+import csv
+import json
+import os
+
+
+class CsvExportWriter:
+    def __init__(self, path, columns):
+        # 带 BOM，Excel 打开中文不乱码
+        self.file = open(path, "w", encoding="utf-8-sig", newline="")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(columns)
+
+    def write_rows(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+
+class JsonlExportWriter:
+    def __init__(self, path, columns):
+        self.file = open(path, "w", encoding="utf-8")
+        self.columns = columns
+
+    def write_rows(self, rows):
+        self.file.writelines(json.dumps(dict(zip(self.columns, row)), ensure_ascii=False) + "\n" for row in rows)
+
+    def close(self):
+        self.file.close()
+
+
+class XlsxExportWriter:
+    """openpyxl 只写模式：行直接写入临时 XML，不在内存中保留单元格。"""
+
+    MAX_SHEET_ROWS = 1_048_576  # Excel 单个工作表的行数上限（含表头）
+
+    def __init__(self, path, columns):
+        from openpyxl import Workbook
+        self.path = path
+        self.columns = columns
+        self.workbook = Workbook(write_only=True)
+        self.sheet = None
+        self.sheet_rows = 0
+
+    def new_sheet(self):
+        index = len(self.workbook.worksheets) + 1
+        self.sheet = self.workbook.create_sheet("学习日志" if index == 1 else f"学习日志{index}")
+        self.sheet.append(self.columns)
+        self.sheet_rows = 1
+
+    def write_rows(self, rows):
+        for row in rows:
+            if self.sheet is None or self.sheet_rows >= self.MAX_SHEET_ROWS:
+                self.new_sheet()
+            self.sheet.append(row)
+            self.sheet_rows += 1
+
+    def close(self):
+        if self.sheet is None:
+            self.new_sheet()
+        self.workbook.save(self.path)
+
+
+EXPORT_WRITERS = {".xlsx": XlsxExportWriter, ".csv": CsvExportWriter, ".jsonl": JsonlExportWriter}
+
+
+def export_writer_class(path):
+    """按扩展名选择写入器，不支持的格式抛出 ValueError。"""
+    writer_class = EXPORT_WRITERS.get(os.path.splitext(path)[1].lower())
+    if writer_class is None:
+        raise ValueError(f"不支持的导出格式: {path}（支持 {', '.join(EXPORT_WRITERS)}）")
+    return writer_class
+
+
+def write_export(path, columns, chunks, total=None, progress=None):
+    """把 chunks（每块为一个行元组列表）写入 path，返回导出行数；没有记录时不创建文件。
+
+    progress(已导出行数, 总行数) 每写完一块调用一次，total 未知时传 None。
+    """
+    writer_class = export_writer_class(path)
+    # 先写临时文件，完成后再替换，失败或取消时不留下半个文件
+    temp_path = path + ".tmp"
+    writer = None
+    replaced = False
+    exported = 0
+    try:
+        for rows in chunks:
+            if not rows:
+                continue
+            if writer is None:
+                writer = writer_class(temp_path, columns)
+            writer.write_rows(rows)
+            exported += len(rows)
+            if progress is not None:
+                progress(exported, total)
+        if writer is not None:
+            closing, writer = writer, None
+            closing.close()
+            os.replace(temp_path, path)
+            replaced = True
+    finally:
+        # 清理过程中的错误不能掩盖最初的异常
+        if writer is not None:
+            with contextlib.suppress(Exception):
+                writer.close()
+        if not replaced:
+            with contextlib.suppress(OSError):
+                os.remove(temp_path)
+    return exported
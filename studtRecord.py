@@ -1,47 +1,179 @@
+import time
+STARTUP_TIME = time.perf_counter()
 import sys
 import os
-import time
-import pandas as pd
+import queue
+import argparse
+import contextlib
+import copy
+import atexit
+import json
+import importlib
 import threading
+import collections
+import concurrent.futures
 from datetime import datetime
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from plyer import notification
-from sklearn.linear_model import LinearRegression
-import numpy as np
 import sqlite3
 from PyQt5 import QtCore, QtGui, QtWidgets
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QLabel, QLineEdit, QPushButton,
-    QVBoxLayout, QHBoxLayout, QMessageBox, QTabWidget, QTableWidget,
-    QTableWidgetItem, QFileDialog, QColorDialog, QComboBox
+    QVBoxLayout, QHBoxLayout, QMessageBox, QTabWidget, QFileDialog,
+    QColorDialog, QComboBox
 )
 from PyQt5.QtGui import QFont
 import logging
+import logging.handlers
+from studtScan import StudySession, SessionExpiryQueue, PollScheduler, MultiRootScanner, WatchEventRouter, create_watcher
+from studtExport import export_writer_class, write_export
+
+
+# ==================== 延迟导入 ====================
+# pandas / matplotlib / plyer 导入耗时数秒，只在首次使用时加载，让登录窗口先显示
+class LazyModule:
+    """首次访问属性时才导入的模块代理。"""
+
+    def __init__(self, name, on_load=None):
+        self._name = name
+        self._on_load = on_load
+        self._module = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    module = importlib.import_module(self._name)
+                    if self._on_load:
+                        self._on_load(module)
+                    self._module = module
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+
+def configure_matplotlib(pyplot):
+    pyplot.rcParams['font.sans-serif'] = ['SimHei']  # 支持中文
+    pyplot.rcParams['axes.unicode_minus'] = False  # 支持负号显示
+
+
+pd = LazyModule("pandas")
+np = LazyModule("numpy")
+plt = LazyModule("matplotlib.pyplot", on_load=configure_matplotlib)
+
+# 启动后在后台预先加载的模块（matplotlib 涉及 Qt 后端，留在主线程首次使用时加载）
+PRELOAD_MODULES = (np, pd)
+
+
+def preload_heavy_modules():
+    start = time.perf_counter()
+    for module in PRELOAD_MODULES:
+        try:
+            module.load()
+        except Exception as e:
+            logging.error(f"预加载模块失败: {e}")
+    logging.info(f"后台预加载模块完成，耗时 {time.perf_counter() - start:.2f} 秒")
 
 # ==================== 配置部分 ====================
-ROOT_DIR = r'D:\课件\学科ppt'  # 根目录
-CHECK_INTERVAL = 2  # 文件检查间隔（秒）
+ROOT_DIRS = [r'D:\课件\学科ppt']  # 根目录列表，可同时包含本地磁盘与网络挂载
+CHECK_INTERVAL = 2  # 有活动时的文件检查间隔（秒）
+MAX_CHECK_INTERVAL = 30  # 没有活动会话时轮询间隔逐步放宽到的上限（秒）
+CHECK_BACKOFF_FACTOR = 2  # 空闲时每轮轮询间隔的放大倍数
+SCAN_DUTY_CYCLE_LIMIT = 0.1  # 扫描耗时占墙钟时间的最大比例
 LEARNING_THRESHOLD = 0.01  # 最小学习时长（分钟）
 INACTIVITY_THRESHOLD = 300 # 不活动超时时间（秒），设置为5分钟
 SUPPORTED_EXTENSIONS = ['.pdf', '.docx', '.pptx']  # 支持的文件类型
+SCAN_WORKERS = 4  # 并行扫描根目录的最大线程数
+ROOT_SCAN_TIMEOUT = 5  # 单个根目录每轮扫描的等待上限（秒），超时的根目录本轮跳过
+ROOT_SCAN_TIMEOUTS = {}  # 按根目录覆盖扫描超时，例如 {r'\\nas\课件': 30}
+WATCHER_BACKEND = "auto"  # 文件监视后端: "auto"（Linux 下优先 inotify）、"inotify" 或 "polling"
 
 # 通知配置
 NOTIFICATION_TITLE = "学习进度提醒"
 NOTIFICATION_DURATION = 5  # 通知持续时间（秒）
+NOTIFICATION_QUEUE_SIZE = 100  # 通知队列容量，队列满时丢弃新通知而不阻塞跟踪线程
+NOTIFICATION_COALESCE_WINDOW = 2.0  # 同一标题的通知在此窗口内合并为一条（秒）
+NOTIFICATION_MIN_INTERVAL = 5.0  # 两次弹出通知之间的最小间隔（秒）
+NOTIFICATION_PREVIEW_ITEMS = 3  # 合并通知中最多列出的文件数
 
 # 数据库配置
 DB_PATH = 'study_tracker.db'
+DB_WRITE_QUEUE_SIZE = 1000  # 写入队列容量（条）
+DB_WRITE_BATCH_SIZE = 50  # 单个事务最多写入的记录数
+DB_WRITE_BATCH_INTERVAL = 1.0  # 记录在队列中最长等待写入的时间（秒）
+DB_WRITE_RETRY_DELAY = 0.5  # 写入遇到 database is locked 等可恢复错误时的首次重试等待（秒）
+DB_WRITE_RETRY_MAX_DELAY = 30  # 重试等待指数增长的上限（秒）
 
 # 日志配置
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("study_tracker.log", encoding='utf-8'),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+LOG_PATH = "study_tracker.log"
+LOG_FORMAT = "text"  # 日志文件格式: "text" 或 "jsonl"（每行一个 JSON 对象）
+LOG_TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+LOG_MAX_BYTES = 5 * 1024 * 1024  # 单个日志文件的大小上限，超过后轮转
+LOG_BACKUP_COUNT = 3  # 保留的历史日志文件数
+
+
+# ==================== 日志 ====================
+class JsonLinesFormatter(logging.Formatter):
+    """每条日志输出为一行 JSON，便于脚本分析。"""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        # 经队列到达的记录只剩 exc_text（见 TracebackQueueHandler.prepare）
+        exc_text = self.formatException(record.exc_info) if record.exc_info else record.exc_text
+        if exc_text:
+            entry["exc_info"] = exc_text
+        if record.stack_info:
+            entry["stack_info"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class TracebackQueueHandler(logging.handlers.QueueHandler):
+    """入队前把异常转为 exc_text 字符串，而不是像默认实现那样拼进消息正文，
+    监听线程中的格式化器（包括 JSON lines）仍能单独输出异常栈。"""
+
+    exception_formatter = logging.Formatter()
+
+    def prepare(self, record):
+        record = copy.copy(record)  # 同一记录可能还会交给其他处理器
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self.exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def setup_logging(log_format=None, path=None):
+    """根日志器只挂 QueueHandler，文件轮转与控制台输出由 QueueListener 线程完成。"""
+    log_format = log_format or LOG_FORMAT
+    file_handler = logging.handlers.RotatingFileHandler(
+        path or LOG_PATH, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding='utf-8'
+    )
+    if log_format == "jsonl":
+        file_handler.setFormatter(JsonLinesFormatter())
+    else:
+        file_handler.setFormatter(logging.Formatter(LOG_TEXT_FORMAT))
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setFormatter(logging.Formatter(LOG_TEXT_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+    root.addHandler(TracebackQueueHandler(log_queue))
+    root.setLevel(logging.INFO)
+    listener = logging.handlers.QueueListener(log_queue, file_handler, console_handler)
+    listener.start()
+    # 退出前写完队列中剩余的日志
+    atexit.register(listener.stop)
+    return listener
 
 
 # ==================== 数据库初始化 ====================
@@ -89,6 +221,7 @@ def initialize_database():
             )
         ''')
         conn.commit()
+        migrate_database(conn)
         logging.info("数据库初始化完成。")
     except Exception as e:
         logging.error(f"数据库初始化失败: {e}")
@@ -96,6 +229,385 @@ def initialize_database():
         conn.close()
 
 
+# ==================== 汇总表 ====================
+# study_rollups 按 (user_id, 粒度, 周期, 学科) 保存累计时长，与 study_logs 的插入在同一事务中更新
+ROLLUP_GRANULARITIES = ("date", "week", "month")
+
+ROLLUP_SCHEMA_SQL = '''
+    CREATE TABLE IF NOT EXISTS study_rollups (
+        user_id INTEGER,
+        granularity TEXT,
+        period TEXT,
+        subject TEXT,
+        duration REAL,
+        sessions INTEGER,
+        PRIMARY KEY (user_id, granularity, period, subject)
+    ) WITHOUT ROWID
+'''
+
+ROLLUP_UPSERT_SQL = '''
+    INSERT INTO study_rollups (user_id, granularity, period, subject, duration, sessions)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT (user_id, granularity, period, subject) DO UPDATE SET
+        duration = duration + excluded.duration,
+        sessions = sessions + excluded.sessions
+'''
+
+ROLLUP_REBUILD_SQL = ['DELETE FROM study_rollups'] + [
+    f'''
+        INSERT INTO study_rollups (user_id, granularity, period, subject, duration, sessions)
+        SELECT user_id, '{granularity}', {granularity}, subject, SUM(duration), COUNT(*)
+        FROM study_logs
+        GROUP BY user_id, {granularity}, subject
+    '''
+    for granularity in ROLLUP_GRANULARITIES
+]
+
+
+def aggregate_rollups(rows):
+    # rows 为 study_logs 插入参数，先在内存中按汇总键合并，减少 upsert 次数
+    totals = {}
+    for row in rows:
+        user_id, subject, duration = row[0], row[2], row[3]
+        for granularity, period in zip(ROLLUP_GRANULARITIES, row[7:10]):
+            key = (user_id, granularity, period, subject)
+            total, sessions = totals.get(key, (0.0, 0))
+            totals[key] = (total + duration, sessions + 1)
+    return [key + value for key, value in totals.items()]
+
+
+def rebuild_rollups():
+    # 从 study_logs 全量重建汇总表，用于修复或导入历史数据后
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        conn.execute('BEGIN')
+        for statement in ROLLUP_REBUILD_SQL + DATA_VERSION_INVALIDATE_SQL:
+            conn.execute(statement)
+        rebuild_trends(conn)
+        conn.commit()
+        count = conn.execute('SELECT COUNT(*) FROM study_rollups').fetchone()[0]
+        logging.info(f"汇总表重建完成，共 {count} 行")
+        return count
+    except Exception as e:
+        conn.rollback()
+        logging.error(f"重建汇总表时出错: {e}")
+        raise
+    finally:
+        conn.close()
+
+
+# ==================== 数据版本 ====================
+# data_versions 记录每个用户 study_logs 的版本号，每次插入学习记录时在同一事务中递增，报表缓存以此判断数据是否变化
+DATA_VERSION_SCHEMA_SQL = '''
+    CREATE TABLE IF NOT EXISTS data_versions (
+        user_id INTEGER PRIMARY KEY,
+        version INTEGER NOT NULL
+    )
+'''
+
+DATA_VERSION_BUMP_SQL = '''
+    INSERT INTO data_versions (user_id, version) VALUES (?, ?)
+    ON CONFLICT (user_id) DO UPDATE SET version = version + excluded.version
+'''
+
+# 批量导入或重建汇总表后让所有用户的缓存失效
+DATA_VERSION_INVALIDATE_SQL = [
+    'INSERT OR IGNORE INTO data_versions (user_id, version) SELECT DISTINCT user_id, 0 FROM study_logs',
+    'UPDATE data_versions SET version = version + 1',
+]
+
+
+def get_data_version(user_id):
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        row = conn.execute('SELECT version FROM data_versions WHERE user_id = ?', (user_id,)).fetchone()
+        return row[0] if row else 0
+    finally:
+        conn.close()
+
+
+# ==================== 学习趋势 ====================
+# trend_stats 保存每个用户每日总时长的线性回归充分统计量（n, Σx, Σy, Σxy, Σx²）和指数加权和，
+# trend_weekdays 按星期几累计时长；二者与 study_logs 的插入在同一事务中增量更新，预测只需读取几行
+TREND_EW_HALFLIFE = 7  # 指数加权平均的半衰期（天）
+
+TREND_SCHEMA_SQL = [
+    '''
+    CREATE TABLE IF NOT EXISTS trend_stats (
+        user_id INTEGER PRIMARY KEY,
+        origin INTEGER,
+        n INTEGER,
+        sum_x REAL,
+        sum_y REAL,
+        sum_xy REAL,
+        sum_xx REAL,
+        last_x INTEGER,
+        max_y REAL,
+        ew_sum REAL,
+        ew_weight REAL
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS trend_weekdays (
+        user_id INTEGER,
+        weekday INTEGER,
+        duration REAL,
+        days INTEGER,
+        PRIMARY KEY (user_id, weekday)
+    ) WITHOUT ROWID
+    ''',
+]
+
+TREND_WEEKDAY_UPSERT_SQL = '''
+    INSERT INTO trend_weekdays (user_id, weekday, duration, days) VALUES (?, ?, ?, ?)
+    ON CONFLICT (user_id, weekday) DO UPDATE SET
+        duration = duration + excluded.duration,
+        days = days + excluded.days
+'''
+
+
+class TrendModel:
+    """单个用户每日总学习时长的增量线性趋势，更新和预测都是常数时间。"""
+
+    FIELDS = ("origin", "n", "sum_x", "sum_y", "sum_xy", "sum_xx", "last_x", "max_y", "ew_sum", "ew_weight")
+
+    def __init__(self, origin=None, n=0, sum_x=0.0, sum_y=0.0, sum_xy=0.0, sum_xx=0.0,
+                 last_x=None, max_y=0.0, ew_sum=0.0, ew_weight=0.0):
+        self.origin = origin  # 第一天的序数，x 取相对天数，避免 Σx² 过大损失精度
+        self.n = n
+        self.sum_x = sum_x
+        self.sum_y = sum_y
+        self.sum_xy = sum_xy
+        self.sum_xx = sum_xx
+        self.last_x = last_x
+        self.max_y = max_y
+        self.ew_sum = ew_sum
+        self.ew_weight = ew_weight
+
+    @classmethod
+    def load(cls, conn, user_id):
+        row = conn.execute(
+            f'SELECT {", ".join(cls.FIELDS)} FROM trend_stats WHERE user_id = ?', (user_id,)
+        ).fetchone()
+        return cls(*row) if row else cls()
+
+    def save(self, conn, user_id):
+        conn.execute(
+            f'INSERT OR REPLACE INTO trend_stats (user_id, {", ".join(self.FIELDS)}) '
+            f'VALUES ({", ".join("?" * (len(self.FIELDS) + 1))})',
+            (user_id, *(getattr(self, field) for field in self.FIELDS))
+        )
+
+    def add(self, ordinal, delta, day_total, new_day):
+        """第 ordinal 天（datetime.toordinal()）的总时长增加 delta，增加后为 day_total。"""
+        if self.origin is None:
+            self.origin = ordinal
+        x = ordinal - self.origin
+        if new_day:
+            self.n += 1
+            self.sum_x += x
+            self.sum_xx += x * x
+        self.sum_y += delta
+        self.sum_xy += x * delta
+        self.max_y = max(self.max_y, day_total)
+
+        # 指数加权以最近一天为基准，出现更晚的日期时已有权重整体衰减
+        if self.last_x is None:
+            self.last_x = x
+        elif x > self.last_x:
+            decay = 0.5 ** ((x - self.last_x) / TREND_EW_HALFLIFE)
+            self.ew_sum *= decay
+            self.ew_weight *= decay
+            self.last_x = x
+        weight = 0.5 ** ((self.last_x - x) / TREND_EW_HALFLIFE)
+        self.ew_sum += weight * delta
+        if new_day:
+            self.ew_weight += weight
+
+    def fit(self):
+        """最小二乘拟合，返回 (斜率, 截距)；不足两天时返回 None。"""
+        denominator = self.n * self.sum_xx - self.sum_x ** 2
+        if self.n < 2 or denominator == 0:
+            return None
+        slope = (self.n * self.sum_xy - self.sum_x * self.sum_y) / denominator
+        return slope, (self.sum_y - slope * self.sum_x) / self.n
+
+    def summary(self, weekday_totals=None):
+        """学习习惯统计与下一天的预测；weekday_totals 为 {星期几: (累计时长, 天数)}，提供时附加按星期修正的预测。"""
+        fit = self.fit()
+        if fit is None:
+            return None
+        slope, intercept = fit
+        next_x = self.last_x + 1
+        next_day = datetime.fromordinal(self.origin + next_x)
+        avg_duration = self.sum_y / self.n
+        stats = {
+            "total_duration": self.sum_y,
+            "avg_duration": avg_duration,
+            "max_duration": self.max_y,
+            "next_day": next_day.strftime('%Y-%m-%d'),
+            "predicted_duration": intercept + slope * next_x,
+            "trend_slope": slope,
+            "ewma_duration": self.ew_sum / self.ew_weight,
+        }
+        duration, days = (weekday_totals or {}).get(next_day.weekday(), (0.0, 0))
+        if days and avg_duration > 0:
+            stats["seasonal_prediction"] = stats["predicted_duration"] * (duration / days) / avg_duration
+        return stats
+
+
+def update_trends(conn, rows):
+    """在写入学习记录的事务中增量更新趋势统计，需在 study_rollups 更新之前调用。"""
+    deltas = {}
+    for row in rows:
+        key = (row[0], row[7])  # (user_id, date)
+        deltas[key] = deltas.get(key, 0.0) + row[3]
+    models = {}
+    for (user_id, day), delta in sorted(deltas.items()):
+        # 汇总表中还没有这一天，说明是新的数据点
+        previous = conn.execute(
+            "SELECT SUM(duration) FROM study_rollups WHERE user_id = ? AND granularity = 'date' AND period = ?",
+            (user_id, day)
+        ).fetchone()[0]
+        if user_id not in models:
+            models[user_id] = TrendModel.load(conn, user_id)
+        day_time = datetime.strptime(day, "%Y-%m-%d")
+        new_day = previous is None
+        models[user_id].add(day_time.toordinal(), delta, (previous or 0.0) + delta, new_day)
+        conn.execute(TREND_WEEKDAY_UPSERT_SQL, (user_id, day_time.weekday(), delta, int(new_day)))
+    for user_id, model in models.items():
+        model.save(conn, user_id)
+
+
+def rebuild_trends(conn):
+    # 从汇总表的每日时长全量重建趋势统计
+    conn.execute('DELETE FROM trend_stats')
+    conn.execute('DELETE FROM trend_weekdays')
+    daily_totals = conn.execute('''
+        SELECT user_id, period, SUM(duration)
+        FROM study_rollups
+        WHERE granularity = 'date'
+        GROUP BY user_id, period
+    ''').fetchall()
+    models = {}
+    weekdays = {}
+    for user_id, day, total in daily_totals:
+        day_time = datetime.strptime(day, "%Y-%m-%d")
+        models.setdefault(user_id, TrendModel()).add(day_time.toordinal(), total, total, True)
+        duration, days = weekdays.get((user_id, day_time.weekday()), (0.0, 0))
+        weekdays[(user_id, day_time.weekday())] = (duration + total, days + 1)
+    for user_id, model in models.items():
+        model.save(conn, user_id)
+    conn.executemany(TREND_WEEKDAY_UPSERT_SQL, [key + value for key, value in weekdays.items()])
+
+
+def load_trend_summary(user_id):
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        model = TrendModel.load(conn, user_id)
+        weekday_totals = {
+            weekday: (duration, days)
+            for weekday, duration, days in conn.execute(
+                'SELECT weekday, duration, days FROM trend_weekdays WHERE user_id = ?', (user_id,)
+            )
+        }
+    finally:
+        conn.close()
+    return model.summary(weekday_totals)
+
+
+# ==================== 数据库迁移 ====================
+# (版本号, 语句列表)，列表元素为 SQL 或接收连接的函数，当前版本记录在 PRAGMA user_version 中
+SCHEMA_MIGRATIONS = [
+    # 报表查询都按 user_id 过滤再按日期/周/月/学科分组，覆盖索引让这些查询只读索引
+    (1, [
+        'CREATE INDEX IF NOT EXISTS idx_study_logs_user_date ON study_logs (user_id, date, subject, duration)',
+        'CREATE INDEX IF NOT EXISTS idx_study_logs_user_week ON study_logs (user_id, week, subject, duration)',
+        'CREATE INDEX IF NOT EXISTS idx_study_logs_user_month ON study_logs (user_id, month, subject, duration)',
+        'CREATE INDEX IF NOT EXISTS idx_study_logs_user_subject ON study_logs (user_id, subject, duration)',
+    ]),
+    # 汇总表，并用已有记录填充
+    (2, [ROLLUP_SCHEMA_SQL] + ROLLUP_REBUILD_SQL),
+    # 数据版本表
+    (3, [DATA_VERSION_SCHEMA_SQL] + DATA_VERSION_INVALIDATE_SQL),
+    # 趋势统计表，由已有的每日汇总计算初值
+    (4, TREND_SCHEMA_SQL + [rebuild_trends]),
+]
+
+# 直接聚合 study_logs 的报表查询，参数均为 (user_id,)，作为汇总表结果的对照与基准
+RAW_REPORT_QUERIES = {
+    "date": 'SELECT date, subject, SUM(duration) FROM study_logs WHERE user_id = ? GROUP BY date, subject',
+    "week": 'SELECT week, subject, SUM(duration) FROM study_logs WHERE user_id = ? GROUP BY week, subject',
+    "month": 'SELECT month, subject, SUM(duration) FROM study_logs WHERE user_id = ? GROUP BY month, subject',
+    "subject": '''
+        SELECT subject, SUM(duration)
+        FROM study_logs
+        WHERE user_id = ?
+        GROUP BY subject
+        ORDER BY SUM(duration) DESC
+    ''',
+    "daily_total": '''
+        SELECT date, SUM(duration) as daily_duration
+        FROM study_logs
+        WHERE user_id = ?
+        GROUP BY date
+        ORDER BY date
+    ''',
+    "export": '''
+        SELECT filename, subject, duration, status, start_time, end_time, date, week, month, last_access_time
+        FROM study_logs
+        WHERE user_id = ?
+    ''',
+}
+
+# 界面使用的报表查询：汇总类报表读取 study_rollups，耗时只取决于周期数
+REPORT_QUERIES = {
+    **{
+        granularity: f'''
+            SELECT period, subject, duration
+            FROM study_rollups
+            WHERE user_id = ? AND granularity = '{granularity}'
+        '''
+        for granularity in ROLLUP_GRANULARITIES
+    },
+    "subject": '''
+        SELECT subject, SUM(duration)
+        FROM study_rollups
+        WHERE user_id = ? AND granularity = 'month'
+        GROUP BY subject
+        ORDER BY SUM(duration) DESC
+    ''',
+    "daily_total": '''
+        SELECT period, SUM(duration) as daily_duration
+        FROM study_rollups
+        WHERE user_id = ? AND granularity = 'date'
+        GROUP BY period
+        ORDER BY period
+    ''',
+    "export": RAW_REPORT_QUERIES["export"],
+}
+
+
+def migrate_database(conn):
+    current_version = conn.execute('PRAGMA user_version').fetchone()[0]
+    for version, statements in SCHEMA_MIGRATIONS:
+        if version <= current_version:
+            continue
+        conn.execute('BEGIN')
+        try:
+            for statement in statements:
+                if callable(statement):
+                    statement(conn)
+                else:
+                    conn.execute(statement)
+            conn.execute(f'PRAGMA user_version = {version}')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        logging.info(f"数据库已迁移到版本 {version}")
+
+
 # ==================== 用户管理功能 ====================
 def register_user(username, email):
     try:
@@ -134,6 +646,246 @@ def login_user(username):
         return None
 
 
+# ==================== 数据库写入线程 ====================
+class DatabaseWriter(threading.Thread):
+    """唯一的 study_logs 写入线程：持久连接 + 有界队列，按数量或时间阈值批量提交。
+    提交从不阻塞调用方：队列满时记录暂存在溢出缓冲区，由写入线程按原顺序转入队列。"""
+
+    INSERT_SQL = '''
+        INSERT INTO study_logs (
+            user_id, filename, subject, duration, status,
+            start_time, end_time, date, week, month, last_access_time
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    '''
+    _STOP = object()
+
+    def __init__(self, db_path=None, batch_size=None, batch_interval=None, queue_size=None):
+        super().__init__(name="DatabaseWriter", daemon=True)
+        self.db_path = db_path or DB_PATH
+        self.batch_size = batch_size or DB_WRITE_BATCH_SIZE
+        self.batch_interval = batch_interval or DB_WRITE_BATCH_INTERVAL
+        self.queue = queue.Queue(maxsize=queue_size or DB_WRITE_QUEUE_SIZE)
+        self.overflow = collections.deque()  # 队列满时暂存的记录与控制项
+        self.overflow_lock = threading.Lock()
+        self.closing = threading.Event()  # 关闭时重试只持续到 close 的超时为止
+        self.close_deadline = None
+        self.written_rows = 0
+        self.committed_batches = 0
+        self.dropped_rows = 0
+        self.queue_full_warned_at = float("-inf")  # 上次提示队列已满的时间，避免刷屏
+
+    def submit(self, row):
+        self.enqueue(row)
+
+    def enqueue(self, item):
+        with self.overflow_lock:
+            self.overflow.append(item)
+            self.drain_overflow()
+            if self.overflow:
+                now = time.monotonic()
+                if now - self.queue_full_warned_at >= 60:
+                    logging.warning(f"数据库写入队列已满，{len(self.overflow)} 条记录暂存在溢出缓冲区")
+                    self.queue_full_warned_at = now
+
+    def drain_overflow(self):
+        # 调用方持有 overflow_lock；溢出缓冲区中的项目总是先于新项目入队，保持提交顺序
+        while self.overflow:
+            try:
+                self.queue.put_nowait(self.overflow[0])
+            except queue.Full:
+                return
+            self.overflow.popleft()
+
+    def flush(self, timeout=None):
+        # 等待此前提交的记录全部写入数据库
+        done = threading.Event()
+        self.enqueue(done)
+        return done.wait(timeout)
+
+    def close(self, timeout=5):
+        if not self.is_alive():
+            return
+        self.close_deadline = time.monotonic() + timeout
+        self.closing.set()
+        self.enqueue(self._STOP)
+        self.join(timeout)
+        if self.is_alive():
+            logging.warning(f"数据库写入线程未能在{timeout}秒内停止。")
+
+    def run(self):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")  # 写入时不阻塞报表查询
+            batch = []
+            deadline = None
+            while True:
+                timeout = None if not batch else max(0.0, deadline - time.monotonic())
+                try:
+                    item = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = None
+                else:
+                    if self.overflow:
+                        with self.overflow_lock:
+                            self.drain_overflow()
+
+                if item is self._STOP:
+                    self.write_batch(conn, batch)
+                    break
+                if isinstance(item, threading.Event):
+                    self.write_batch(conn, batch)
+                    batch = []
+                    item.set()
+                    continue
+                if item is not None:
+                    if not batch:
+                        deadline = time.monotonic() + self.batch_interval
+                    batch.append(item)
+                if batch and (len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                    self.write_batch(conn, batch)
+                    batch = []
+        finally:
+            conn.close()
+
+    def write_batch(self, conn, batch):
+        if not batch:
+            return
+        delay = DB_WRITE_RETRY_DELAY
+        while True:
+            try:
+                with conn:
+                    conn.executemany(self.INSERT_SQL, batch)
+                    update_trends(conn, batch)
+                    conn.executemany(ROLLUP_UPSERT_SQL, aggregate_rollups(batch))
+                    conn.executemany(DATA_VERSION_BUMP_SQL, collections.Counter(row[0] for row in batch).items())
+            except sqlite3.OperationalError as e:
+                # database is locked、磁盘 I/O 错误等：回滚后保留本批记录，退避重试
+                self.rollback(conn)
+                if self.closing.is_set():
+                    remaining = self.close_deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.drop_batch(batch, e)
+                        return
+                    time.sleep(min(delay, remaining))
+                else:
+                    logging.warning(f"批量写入学习记录失败（{len(batch)} 条），{delay:.1f} 秒后重试: {e}")
+                    self.closing.wait(delay)
+                delay = min(delay * 2, DB_WRITE_RETRY_MAX_DELAY)
+                continue
+            except Exception as e:
+                # 约束冲突、数据库损坏等重试也无法成功的错误
+                self.rollback(conn)
+                self.drop_batch(batch, e)
+                return
+            self.written_rows += len(batch)
+            self.committed_batches += 1
+            return
+
+    @staticmethod
+    def rollback(conn):
+        with contextlib.suppress(sqlite3.Error):
+            conn.rollback()
+
+    def drop_batch(self, batch, error):
+        self.dropped_rows += len(batch)
+        logging.error(f"放弃写入 {len(batch)} 条学习记录: {error}")
+        for row in batch:
+            logging.error(f"未写入的学习记录: {row}")
+
+
+# ==================== 通知分发 ====================
+class NotificationDispatcher(threading.Thread):
+    """后台通知线程：调用方只入队，同一标题在合并窗口内的通知合成一条，并限制弹出频率。"""
+
+    _STOP = object()
+
+    def __init__(self, deliver, window=None, min_interval=None, queue_size=None):
+        super().__init__(name="NotificationDispatcher", daemon=True)
+        self.deliver = deliver
+        self.window = NOTIFICATION_COALESCE_WINDOW if window is None else window
+        self.min_interval = NOTIFICATION_MIN_INTERVAL if min_interval is None else min_interval
+        self.queue = queue.Queue(maxsize=queue_size or NOTIFICATION_QUEUE_SIZE)
+        self.enabled = True
+        self.delivered = 0
+        self.dropped = 0
+        self.queue_full_warned_at = float("-inf")  # 上次提示队列已满的时间，避免刷屏
+
+    def notify(self, title, message, item=None):
+        # item 为合并时列出的对象（例如文件名），缺省时使用 message
+        if not self.enabled:
+            return
+        try:
+            self.queue.put_nowait((title, message, item or message))
+        except queue.Full:
+            # 通知后端卡住时直接丢弃，不能反压到跟踪线程
+            self.dropped += 1
+            now = time.monotonic()
+            if now - self.queue_full_warned_at >= 60:
+                logging.warning(f"通知队列已满，已丢弃 {self.dropped} 条通知")
+                self.queue_full_warned_at = now
+
+    def close(self, timeout=5):
+        # 立即发出尚未合并完的通知后停止
+        if not self.is_alive():
+            return
+        try:
+            self.queue.put(self._STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        self.join(timeout)
+        if self.is_alive():
+            logging.warning(f"通知线程未能在{timeout}秒内停止。")
+
+    def run(self):
+        pending = {}  # 标题 -> [条数, 前几项, 最后一条消息]
+        deadline = None
+        last_sent = float("-inf")
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is self._STOP:
+                self.flush(pending)
+                break
+            if item is not None:
+                title, message, name = item
+                if not pending:
+                    deadline = time.monotonic() + self.window
+                group = pending.setdefault(title, [0, [], message])
+                group[0] += 1
+                if len(group[1]) < NOTIFICATION_PREVIEW_ITEMS:
+                    group[1].append(name)
+                group[2] = message
+            if pending and time.monotonic() >= deadline:
+                # 距上次弹出不足最小间隔时继续累积，到点再一并发出
+                wait = last_sent + self.min_interval - time.monotonic()
+                if wait > 0:
+                    deadline = time.monotonic() + wait
+                    continue
+                self.flush(pending)
+                pending = {}
+                deadline = None
+                last_sent = time.monotonic()
+
+    def flush(self, pending):
+        for title, (count, names, message) in pending.items():
+            if count > 1:
+                more = " 等" if count > len(names) else ""
+                message = f"{title} {count} 个文件: {', '.join(names)}{more}"
+            try:
+                self.deliver(title, message)
+                self.delivered += 1
+            except Exception as e:
+                logging.error(f"发送通知失败: {e}")
+
+
+# 发布给界面等读者的不可变会话快照条目
+SessionView = collections.namedtuple("SessionView", "file filename subject start_time last_fluctuation")
+
+
 # ==================== 学习时长跟踪 ====================
 class StudyTracker(threading.Thread):
     def __init__(self, user_id, stop_event, notify_callback, log_callback):
@@ -144,103 +896,179 @@ class StudyTracker(threading.Thread):
         self.log_callback = log_callback
         self.active_sessions = {}
         self.active_sessions_lock = threading.Lock()
+        # 每轮结束后发布的不可变快照（SessionView 元组），读者直接读取属性，无需获取 active_sessions_lock
+        self.sessions_snapshot = ()
+        self.sessions_version = 0
+        self.sessions_dirty = False
+        self.expiry_queue = SessionExpiryQueue(INACTIVITY_THRESHOLD)
+        self.poll_scheduler = PollScheduler(CHECK_INTERVAL, MAX_CHECK_INTERVAL, CHECK_BACKOFF_FACTOR, SCAN_DUTY_CYCLE_LIMIT)
+        self.watcher_backend = None  # 实际使用的监视方式，线程启动后为 "inotify" 或 "polling"
+        self.scanner = MultiRootScanner(ROOT_DIRS, SUPPORTED_EXTENSIONS, SCAN_WORKERS, ROOT_SCAN_TIMEOUT, ROOT_SCAN_TIMEOUTS)
         self.all_files = self.get_all_supported_files()
+        self.db_writer = DatabaseWriter(DB_PATH)
+        self.db_writer.start()
 
     def get_all_supported_files(self):
-        supported_files = {}
-        for root, _, files in os.walk(ROOT_DIR):
-            for file in files:
-                if any(file.endswith(ext) for ext in SUPPORTED_EXTENSIONS):
-                    file_path = os.path.join(root, file)
-                    try:
-                        supported_files[file_path] = os.path.getatime(file_path)
-                    except FileNotFoundError:
-                        continue
-        return supported_files
+        return self.scanner.scan()  # FileRegistry
 
     def run(self):
         logging.info("学习时长跟踪线程启动")
+        watcher = create_watcher(WATCHER_BACKEND, self.scanner, SUPPORTED_EXTENSIONS)
+        if watcher is not None:
+            self.watcher_backend = "inotify"
+            self.run_event_loop(watcher)
+        else:
+            self.watcher_backend = "polling"
+            self.run_polling_loop()
+        self.scanner.close()
+        logging.info("学习时长跟踪线程停止")
+
+    def run_event_loop(self, watcher):
+        router = WatchEventRouter(self.scanner)
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    for kind, file, event_time, file_id in router.poll(watcher, CHECK_INTERVAL):
+                        self.handle_watch_event(kind, file, event_time, file_id)
+                    self.expire_inactive_sessions(time.time())
+                    self.publish_sessions()
+                except Exception as e:
+                    logging.error(f"跟踪线程错误: {e}")
+        finally:
+            watcher.close()
+
+    def handle_watch_event(self, kind, file, event_time, file_id):
+        # WatchEventRouter 已更新注册表
+        if kind == "access":
+            self.handle_file_activity(file_id, event_time)
+        elif kind == "created":
+            logging.info(f"检测到新文件: {file}")
+        elif kind == "removed":
+            self.handle_tree_removed(file)
+
+    def run_polling_loop(self):
         while not self.stop_event.is_set():
+            scan_start = time.perf_counter()
+            active = False
             try:
                 current_time = time.time()
-                current_files = self.get_all_supported_files()
+                # 一次遍历得到变化量，atime 直接取自扫描时的 stat 结果
+                added, changed, removed = self.scanner.diff()
+
+                for file_id in added:
+                    # 新文件被添加
+                    logging.info(f"检测到新文件: {self.all_files.path(file_id)}")
 
                 # 检测文件波动
-                for file, last_atime in current_files.items():
-                    current_atime = os.path.getatime(file)
-                    if file not in self.all_files:
-                        # 新文件被添加
-                        self.all_files[file] = current_atime
-                        logging.info(f"检测到新文件: {file}")
-
-                    if current_atime != self.all_files[file]:
-                        with self.active_sessions_lock:
-                            if file not in self.active_sessions:
-                                # 新的学习会话开始
-                                self.active_sessions[file] = {
-                                    "start_time": current_time,
-                                    "last_fluctuation": current_time
-                                }
-                                self.notify_callback(
-                                    "开始学习",
-                                    f"开始学习: {os.path.basename(file)}"
-                                )
-                                self.log_callback(f"开始学习: {file} at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-                                logging.info(f"🟢 开始学习: {file} 于 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-                            else:
-                                # 更新最后一次波动时间
-                                self.active_sessions[file]["last_fluctuation"] = current_time
-                        self.all_files[file] = current_atime
+                for file_id in changed:
+                    self.handle_file_activity(file_id, current_time)
 
                 # 检测不活动超时
-                with self.active_sessions_lock:
-                    files_to_remove = []
-                    for file, times in self.active_sessions.items():
-                        last_fluctuation = times["last_fluctuation"]
-                        if current_time - last_fluctuation > INACTIVITY_THRESHOLD:
-                            duration = (last_fluctuation - times["start_time"]) / 60  # 转换为分钟
-                            if duration >= LEARNING_THRESHOLD:
-                                self.log_study_time(file, times["start_time"], last_fluctuation)
-                                self.notify_callback(
-                                    "停止学习",
-                                    f"停止学习: {os.path.basename(file)}，时长 {duration:.2f} 分钟"
-                                )
-                                self.log_callback(f"停止学习: {file} at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-                                logging.info(
-                                    f"🛑 停止学习: {file} -> {duration:.2f} 分钟 于 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-                            files_to_remove.append(file)
-                    for file in files_to_remove:
-                        del self.active_sessions[file]
-
-                # 更新 all_files 字典，移除已删除的文件
-                removed_files = set(self.all_files.keys()) - set(current_files.keys())
-                for file in removed_files:
-                    with self.active_sessions_lock:
-                        if file in self.active_sessions:
-                            times = self.active_sessions[file]
-                            duration = (times["last_fluctuation"] - times["start_time"]) / 60
-                            if duration >= LEARNING_THRESHOLD:
-                                self.log_study_time(file, times["start_time"], times["last_fluctuation"])
-                                self.notify_callback(
-                                    "停止学习",
-                                    f"文件被删除或移动: {os.path.basename(file)}，时长 {duration:.2f} 分钟"
-                                )
-                                self.log_callback(
-                                    f"文件被删除或移动: {file} at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-                                logging.info(
-                                    f"🛑 文件被删除或移动: {file} -> {duration:.2f} 分钟 于 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-                            del self.active_sessions[file]
-                    del self.all_files[file]
+                self.expire_inactive_sessions(current_time)
+
+                # 结束已删除文件的会话（扫描器已从注册表中移除）
+                for file in removed:
+                    self.handle_file_removed(file)
 
+                self.publish_sessions()
+                active = bool(changed or self.sessions_snapshot)
             except Exception as e:
                 logging.error(f"跟踪线程错误: {e}")
-            time.sleep(CHECK_INTERVAL)
-        logging.info("学习时长跟踪线程停止")
-
-    def log_study_time(self, file_path, start_time, end_time):
+            interval = self.poll_scheduler.next_interval(time.perf_counter() - scan_start, active)
+            # 用 wait 代替 sleep，退避到较长间隔时也能及时响应停止
+            self.stop_event.wait(interval)
+
+    def handle_file_activity(self, file_id, current_time):
+        file = self.all_files.path(file_id)
+        with self.active_sessions_lock:
+            session = self.active_sessions.get(file)
+            if session is None:
+                # 新的学习会话开始
+                session = StudySession(self.all_files.name(file_id), self.all_files.subject(file_id), current_time)
+                self.active_sessions[file] = session
+                self.expiry_queue.schedule(file, session)
+                self.notify_callback(
+                    "开始学习",
+                    f"开始学习: {session.filename}",
+                    session.filename
+                )
+                self.log_callback(f"开始学习: {file} at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+                logging.info(f"🟢 开始学习: {file} 于 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+            else:
+                # 更新最后一次波动时间
+                session.last_fluctuation = current_time
+            self.sessions_dirty = True
+
+    def expire_inactive_sessions(self, current_time):
+        records = []
+        with self.active_sessions_lock:
+            # 只处理截止时间已到的会话，不再每轮遍历全部会话
+            for file in self.expiry_queue.pop_expired(self.active_sessions, current_time):
+                session = self.active_sessions.pop(file)
+                self.sessions_dirty = True
+                last_fluctuation = session.last_fluctuation
+                duration = (last_fluctuation - session.start_time) / 60  # 转换为分钟
+                if duration >= LEARNING_THRESHOLD:
+                    records.append(self.study_record(session, last_fluctuation))
+                    self.notify_callback(
+                        "停止学习",
+                        f"停止学习: {session.filename}，时长 {duration:.2f} 分钟",
+                        session.filename
+                    )
+                    self.log_callback(f"停止学习: {file} at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+                    logging.info(
+                        f"🛑 停止学习: {file} -> {duration:.2f} 分钟 于 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        self.submit_records(records)
+
+    def handle_file_removed(self, file):
+        records = []
+        with self.active_sessions_lock:
+            session = self.active_sessions.get(file)
+            if session is not None:
+                duration = (session.last_fluctuation - session.start_time) / 60
+                if duration >= LEARNING_THRESHOLD:
+                    records.append(self.study_record(session, session.last_fluctuation))
+                    self.notify_callback(
+                        "停止学习",
+                        f"文件被删除或移动: {session.filename}，时长 {duration:.2f} 分钟",
+                        session.filename
+                    )
+                    self.log_callback(
+                        f"文件被删除或移动: {file} at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+                    logging.info(
+                        f"🛑 文件被删除或移动: {file} -> {duration:.2f} 分钟 于 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+                del self.active_sessions[file]
+                self.sessions_dirty = True
+        self.submit_records(records)
+
+    def handle_tree_removed(self, path):
+        # inotify 对整个目录的移出只产生一个事件，需要结束该目录下的所有会话
+        prefix = path + os.sep
+        with self.active_sessions_lock:
+            affected = [f for f in self.active_sessions if f == path or f.startswith(prefix)]
+        for file in affected:
+            self.handle_file_removed(file)
+
+    def publish_sessions(self):
+        """会话有变化时生成新的快照并整体替换，已发布的快照永不修改（写时复制）。"""
+        if not self.sessions_dirty:
+            return
+        with self.active_sessions_lock:
+            snapshot = tuple(
+                SessionView(file, session.filename, session.subject, session.start_time, session.last_fluctuation)
+                for file, session in self.active_sessions.items()
+            )
+            self.sessions_dirty = False
+        # 先替换快照再递增版本，读者先读版本后读快照，拿到的快照不会比版本旧
+        self.sessions_snapshot = snapshot
+        self.sessions_version += 1
+
+    def study_record(self, session, end_time):
+        """生成一条 study_logs 记录；可在持有会话锁时调用，提交到写入线程须在释放锁之后（submit_records）。"""
+        start_time = session.start_time
         duration = (end_time - start_time) / 60  # 转换为分钟
-        filename = os.path.basename(file_path)
-        subject = file_path.split(os.sep)[-2] if len(file_path.split(os.sep)) >= 2 else "未知"
+        filename = session.filename
+        subject = session.subject
         now = datetime.now()
         date = now.strftime("%Y-%m-%d")
         week = now.strftime("%U")
@@ -250,25 +1078,563 @@ class StudyTracker(threading.Thread):
 
         status = "已完成" if duration >= 15 else "进行中"
 
+        logging.info(f"学习时长记录: {filename}, 时长: {duration:.2f} 分钟")
+        return (
+            self.user_id, filename, subject, round(duration, 2), status,
+            start_datetime, end_datetime, date, week, month,
+            now.strftime("%Y-%m-%d %H:%M:%S")
+        )
+
+    def submit_records(self, records):
+        # 只入队，由 DatabaseWriter 线程批量写入，跟踪循环不等待磁盘 I/O
+        for record in records:
+            self.db_writer.submit(record)
+
+
+# ==================== 后台报表 ====================
+REPORT_WORKERS = 2  # 报表计算线程数
+REPORT_CACHE_SIZE = 16  # 缓存的报表结果数
+
+
+class ReportCancelled(Exception):
+    """报表请求已被新的请求取代。"""
+
+
+class ReportSignals(QtCore.QObject):
+    finished = QtCore.pyqtSignal(object)
+    failed = QtCore.pyqtSignal(str)
+    progress = QtCore.pyqtSignal(int, int)
+    done = QtCore.pyqtSignal()
+
+
+class ReportTask(QtCore.QRunnable):
+    """在线程池中执行报表计算与绘图，结果通过信号回到界面线程。"""
+
+    def __init__(self, job, cancelled, with_progress=False):
+        super().__init__()
+        self.job = job
+        self.cancelled = cancelled
+        self.with_progress = with_progress
+        self.signals = ReportSignals()
+
+    def run(self):
         try:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO study_logs (
-                    user_id, filename, subject, duration, status,
-                    start_time, end_time, date, week, month, last_access_time
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                self.user_id, filename, subject, round(duration, 2), status,
-                start_datetime, end_datetime, date, week, month,
-                now.strftime("%Y-%m-%d %H:%M:%S")
-            ))
-            conn.commit()
-            logging.info(f"学习时长记录: {filename}, 时长: {duration:.2f} 分钟")
+            if self.cancelled():
+                return
+            if self.with_progress:
+                # 进度回调取自任务自身：任务运行完会被线程池删除，不能让其他闭包持有它
+                result = self.job(self.cancelled, self.signals.progress.emit)
+            else:
+                result = self.job(self.cancelled)
+            if not self.cancelled():
+                self.signals.finished.emit(result)
         except Exception as e:
-            logging.error(f"记录学习时长时出错: {e}")
+            # 已被取代的请求（包括被中断的查询）出错时不再打扰用户
+            if not isinstance(e, ReportCancelled) and not self.cancelled():
+                self.signals.failed.emit(str(e))
         finally:
-            conn.close()
+            self.signals.done.emit()
+
+
+class ReportCache:
+    """按 (user_id, 报表类型, 数据版本) 缓存已绘制图表与分析结果的 LRU 缓存。"""
+
+    MISSING = object()
+
+    def __init__(self, maxsize=None):
+        self.maxsize = maxsize or REPORT_CACHE_SIZE
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return self.MISSING
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key]
+
+    def put(self, key, value):
+        user_id, report_type, version = key
+        with self.lock:
+            # 同一报表的旧版本不会再被命中，直接丢弃
+            for stale in [k for k in self.entries if k[:2] == (user_id, report_type) and k[2] != version]:
+                del self.entries[stale]
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+
+def build_cached_report(cache, user_id, report_type, build, cancelled):
+    """返回 (数据版本, 报表结果)；版本未变时直接使用缓存。"""
+    # 先读版本再计算：计算期间写入的新记录只会让下一次刷新重新生成
+    version = get_data_version(user_id)
+    key = (user_id, report_type, version)
+    result = cache.get(key)
+    if result is ReportCache.MISSING:
+        result = build(cancelled)
+        cache.put(key, result)
+    return version, result
+
+
+def fetch_report_rows(query_name, user_id, cancelled=None):
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        if cancelled is not None:
+            # 请求被取代后中断仍在执行的查询
+            conn.set_progress_handler(cancelled, 10000)
+        return conn.execute(REPORT_QUERIES[query_name], (user_id,)).fetchall()
+    finally:
+        conn.close()
+
+
+def new_report_figure(figsize, dpi):
+    # 直接使用 Figure 而不是 pyplot，可以在非界面线程中绘制
+    from matplotlib.figure import Figure
+    return Figure(figsize=figsize, dpi=dpi)
+
+
+def render_period_summary(user_id, group_by, title, figsize, dpi, cancelled):
+    results = fetch_report_rows(group_by, user_id, cancelled)
+    if not results:
+        return None
+    df = pd.DataFrame(results, columns=[group_by, 'subject', 'duration'])
+    summary = df.pivot_table(index=group_by, columns='subject', values='duration', aggfunc='sum').fillna(0)
+    if cancelled():
+        raise ReportCancelled()
+
+    figure = new_report_figure(figsize, dpi)
+    ax = figure.add_subplot(111)
+    summary.plot(kind='bar', stacked=True, ax=ax)
+    ax.set_title(title)
+    ax.set_xlabel(group_by.capitalize())
+    ax.set_ylabel("学习时长（分钟）")
+    return figure
+
+
+def render_subject_summary(user_id, figsize, dpi, cancelled):
+    results = fetch_report_rows("subject", user_id, cancelled)
+    if not results:
+        return None
+    df = pd.DataFrame(results, columns=['subject', 'duration'])
+    summary = df.set_index('subject')['duration']
+    if cancelled():
+        raise ReportCancelled()
+
+    figure = new_report_figure(figsize, dpi)
+    ax1 = figure.add_subplot(121)
+    ax2 = figure.add_subplot(122)
+
+    summary.plot(kind='bar', ax=ax1)
+    ax1.set_title("学科学习时长分布")
+    ax1.set_xlabel("学科")
+    ax1.set_ylabel("学习时长（分钟）")
+
+    summary.plot(kind='pie', autopct='%1.1f%%', ax=ax2, legend=False)
+    ax2.set_title("学科学习时长占比")
+    ax2.set_ylabel("")
+    return figure
+
+
+def load_daily_totals(user_id, cancelled):
+    results = fetch_report_rows("daily_total", user_id, cancelled)
+    if len(results) < 2:
+        return None
+    df = pd.DataFrame(results, columns=['date', 'daily_duration'])
+    df['date'] = pd.to_datetime(df['date'])
+    df.sort_values('date', inplace=True)
+    return df
+
+
+def format_analysis(stats):
+    return f"""
+总学习时长: {stats['total_duration']:.2f} 分钟
+平均每日学习时长: {stats['avg_duration']:.2f} 分钟
+最高每日学习时长: {stats['max_duration']:.2f} 分钟
+近期加权平均每日学习时长: {stats['ewma_duration']:.2f} 分钟
+
+预测 {stats['next_day']} 的学习时长: {stats['predicted_duration']:.2f} 分钟
+""" + (f"按星期几修正后的预测: {stats['seasonal_prediction']:.2f} 分钟\n" if "seasonal_prediction" in stats else "")
+
+
+def plot_daily_totals(df, figsize, dpi):
+    # 学习时长趋势
+    figure = new_report_figure(figsize, dpi)
+    ax = figure.add_subplot(111)
+    ax.plot(df['date'], df['daily_duration'], marker='o')
+    ax.set_title("每日学习时长趋势")
+    ax.set_xlabel("日期")
+    ax.set_ylabel("学习时长（分钟）")
+    ax.grid(True)
+    figure.tight_layout()
+    return figure
+
+
+def analyze_daily_totals(user_id, figsize, dpi, cancelled):
+    """返回 (趋势图, 分析文本)，数据不足两天时返回 None。"""
+    stats = load_trend_summary(user_id)
+    if stats is None:
+        return None
+    # 统计与预测直接读取增量维护的趋势表，只有趋势图需要每日数据
+    df = load_daily_totals(user_id, cancelled)
+    if df is None:
+        return None
+    if cancelled():
+        raise ReportCancelled()
+    return plot_daily_totals(df, figsize, dpi), format_analysis(stats)
+
+
+# ==================== 流式导出 ====================
+# 按块读取游标并逐行写出，内存占用与导出行数无关
+EXPORT_CHUNK_SIZE = 20_000  # 每次从游标读取的行数
+EXPORT_COLUMNS = [
+    "文件名", "学科", "学习时长（分钟）", "状态",
+    "开始时间", "结束时间", "日期", "周", "月",
+    "最后访问时间"
+]
+
+# 日期参数为 None 时不限制该端；(user_id, date) 前缀索引让日期范围查询只扫描范围内的记录
+EXPORT_FILTER_SQL = '''
+    FROM study_logs
+    WHERE user_id = ? AND date >= COALESCE(?, '') AND date <= COALESCE(?, '9999-99-99')
+'''
+EXPORT_SQL = '''
+    SELECT filename, subject, duration, status, start_time, end_time, date, week, month, last_access_time
+''' + EXPORT_FILTER_SQL
+EXPORT_COUNT_SQL = 'SELECT COUNT(*)' + EXPORT_FILTER_SQL
+
+
+def export_study_logs(user_id, path, start_date=None, end_date=None, progress=None, cancelled=None):
+    """把用户在 [start_date, end_date] 内的学习记录流式导出到 path（按扩展名选择格式），返回导出行数。
+
+    progress(已导出行数, 总行数) 每写完一块调用一次；没有记录时不创建文件。
+    """
+    export_writer_class(path)
+    params = (user_id, start_date, end_date)
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        total = conn.execute(EXPORT_COUNT_SQL, params).fetchone()[0]
+        if total == 0:
+            return 0
+
+        def chunks():
+            cursor = conn.execute(EXPORT_SQL, params)
+            while True:
+                rows = cursor.fetchmany(EXPORT_CHUNK_SIZE)
+                if not rows:
+                    return
+                if cancelled is not None and cancelled():
+                    raise ReportCancelled()
+                yield rows
+
+        return write_export(path, EXPORT_COLUMNS, chunks(), total, progress)
+    finally:
+        conn.close()
+
+
+# ==================== 批量报表渲染 ====================
+# 无界面模式：每个用户的报表在独立进程中用 Agg 后端绘制，数据版本未变化的用户跳过
+RENDER_FORMATS = ("png", "svg")  # 输出的图片格式
+RENDER_STATE_FILE = "render_state.json"  # 记录每个用户上次渲染时的数据版本
+RENDER_FIGSIZE = (10, 6)
+RENDER_DPI = 100
+
+BATCH_PERIOD_REPORTS = (
+    ("date", "每日学科学习时长"),
+    ("week", "每周学科学习时长"),
+    ("month", "每月学科学习时长"),
+)
+
+
+def init_render_worker(db_path):
+    global DB_PATH
+    DB_PATH = db_path
+    # fork 出的子进程继承了主进程的 QueueHandler，但没有对应的监听线程，改为直接输出
+    logging.basicConfig(level=logging.INFO, format=LOG_TEXT_FORMAT, force=True)
+    import matplotlib
+    matplotlib.use("Agg")  # pandas 绘图会导入 pyplot，子进程中不能加载 Qt 后端
+    configure_matplotlib(matplotlib)
+
+
+def save_figure(figure, out_dir, name, formats):
+    files = []
+    for fmt in formats:
+        filename = f"{name}.{fmt}"
+        figure.savefig(os.path.join(out_dir, filename), format=fmt)
+        files.append(filename)
+    return files
+
+
+def render_user_reports(user_id, username, version, out_dir, formats):
+    """渲染单个用户的全部报表和 summary.json，在进程池中执行。"""
+    never_cancelled = lambda: False
+    user_dir = os.path.join(out_dir, f"user_{user_id}")
+    os.makedirs(user_dir, exist_ok=True)
+
+    charts = {}
+    for group_by, title in BATCH_PERIOD_REPORTS:
+        figure = render_period_summary(user_id, group_by, title, RENDER_FIGSIZE, RENDER_DPI, never_cancelled)
+        if figure is not None:
+            charts[group_by] = save_figure(figure, user_dir, group_by, formats)
+    figure = render_subject_summary(user_id, RENDER_FIGSIZE, RENDER_DPI, never_cancelled)
+    if figure is not None:
+        charts["subject"] = save_figure(figure, user_dir, "subject", formats)
+
+    analysis = load_trend_summary(user_id)
+    df = load_daily_totals(user_id, never_cancelled)
+    if df is not None:
+        charts["trend"] = save_figure(plot_daily_totals(df, RENDER_FIGSIZE, RENDER_DPI), user_dir, "trend", formats)
+
+    summary = {
+        "user_id": user_id,
+        "username": username,
+        "data_version": version,
+        "generated_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        "subjects": dict(fetch_report_rows("subject", user_id)),
+        "analysis": analysis,
+        "charts": charts,
+    }
+    with open(os.path.join(user_dir, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    return user_id, version
+
+
+def render_all_reports(out_dir, formats=None, workers=None, force=False):
+    """为 users 表中的每个用户渲染报表，返回本次渲染的用户数。"""
+    formats = formats or RENDER_FORMATS
+    os.makedirs(out_dir, exist_ok=True)
+    state_path = os.path.join(out_dir, RENDER_STATE_FILE)
+    try:
+        with open(state_path, encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        state = {}
+
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        users = conn.execute('''
+            SELECT users.id, users.username, COALESCE(data_versions.version, 0)
+            FROM users LEFT JOIN data_versions ON data_versions.user_id = users.id
+        ''').fetchall()
+    finally:
+        conn.close()
+    pending = [user for user in users if force or state.get(str(user[0])) != user[2]]
+    logging.info(f"批量渲染报表: {len(pending)}/{len(users)} 个用户需要更新")
+
+    start = time.perf_counter()
+    rendered = 0
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers, initializer=init_render_worker, initargs=(os.path.abspath(DB_PATH),)) as executor:
+        futures = {
+            executor.submit(render_user_reports, user_id, username, version, out_dir, formats): username
+            for user_id, username, version in pending
+        }
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                user_id, version = future.result()
+            except Exception as e:
+                logging.error(f"渲染用户 {futures[future]} 的报表时出错: {e}")
+                continue
+            state[str(user_id)] = version
+            rendered += 1
+
+    # 先写临时文件再替换，中途退出不会留下损坏的状态文件
+    with open(state_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(state_path + ".tmp", state_path)
+
+    forecast_path = os.path.join(out_dir, "forecast.json")
+    if rendered or not os.path.exists(forecast_path):
+        write_cohort_forecast(forecast_path)
+    logging.info(f"批量渲染完成: {rendered} 个用户，耗时 {time.perf_counter() - start:.2f} 秒")
+    return rendered
+
+
+# ==================== 批量预测 ====================
+# 一次读取所有 用户×学科 的每日时长，组成稠密矩阵后用向量化最小二乘同时拟合所有序列的线性趋势
+FORECAST_HORIZON = 7  # 默认预测未来天数
+UNIX_EPOCH_ORDINAL = datetime(1970, 1, 1).toordinal()  # datetime64[D] 的零点对应的 datetime.toordinal()
+
+# forecasts 形状为 (序列数, 预测天数)，第 j 列对应 start_date 之后第 j 天；user_ids/subjects 与行一一对应
+BatchForecast = collections.namedtuple("BatchForecast", "user_ids subjects start_date forecasts slopes intercepts")
+
+# 每个用户返回一行，同一行内的几个 group_concat 按相同的行顺序拼接。比逐行取回 (用户, 学科, 日期, 时长)
+# 元组少创建近百万个 Python 对象。日期固定 10 个字符，不需要分隔符；学科是目录名，可能含逗号，用 0x1F 分隔；
+# 时长用 quote() 输出，保证文本能精确还原为原来的浮点数
+DAILY_ROLLUPS_SQL = '''
+    SELECT user_id, COUNT(*), group_concat(period, ''), group_concat(subject, char(31)),
+           group_concat(quote(duration))
+    FROM study_rollups
+    WHERE granularity = 'date' AND period > ?
+    GROUP BY user_id
+'''
+
+
+def load_daily_matrix(history_days=None):
+    """返回 (user_ids, subjects, first_day, matrix, observed)。
+
+    matrix[i, d] 为第 i 个序列在 first_day 之后第 d 天的学习时长，observed[i, d] 表示这一天是否有学习记录。
+    没有记录的天在 matrix 中为 0，拟合时按 observed 跳过。
+    """
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        cutoff = ""
+        if history_days:
+            # 只取全体数据最后一天之前 history_days 天内的记录
+            cutoff = conn.execute(
+                "SELECT date(MAX(period), ?) FROM study_rollups WHERE granularity = 'date'",
+                (f"-{history_days} days",)
+            ).fetchone()[0] or ""
+        rows = conn.execute(DAILY_ROLLUPS_SQL, (cutoff,)).fetchall()
+    finally:
+        conn.close()
+    if not rows:
+        return (np.empty(0, dtype=np.int64), np.empty(0, dtype=object), None, np.zeros((0, 0)),
+                np.zeros((0, 0), dtype=bool))
+
+    user_ids, counts, periods, subjects, durations = zip(*rows)
+    users = np.repeat(np.array(user_ids, dtype=np.int64), counts)
+    # 定长日期串直接由 NumPy 解析为天数，不再逐行调用 SQLite 的 julianday()
+    days = np.frombuffer("".join(periods).encode("ascii"), dtype="S10").astype("datetime64[D]").astype(np.int64)
+    values = np.fromstring(",".join(durations), sep=",")
+    # 学科只有十几种，先在 Python 中编号，再把 (user_id, 学科编号) 合成整数键交给 NumPy 分组，省去 SQL 排序
+    subject_list = "\x1f".join(subjects).split("\x1f")
+    subject_codes = {subject: code for code, subject in enumerate(dict.fromkeys(subject_list))}
+    codes = np.fromiter(map(subject_codes.__getitem__, subject_list), dtype=np.int64, count=len(subject_list))
+    keys = users * len(subject_codes) + codes
+    unique_keys, series = np.unique(keys, return_inverse=True)
+    first = days.min()
+    days -= first
+
+    matrix = np.zeros((len(unique_keys), days.max() + 1))
+    matrix[series, days] = values
+    observed = np.zeros(matrix.shape, dtype=bool)
+    observed[series, days] = True
+    subject_names = np.array(list(subject_codes), dtype=object)
+    first_day = datetime.fromordinal(UNIX_EPOCH_ORDINAL + int(first))
+    return unique_keys // len(subject_codes), subject_names[unique_keys % len(subject_codes)], first_day, matrix, observed
+
+
+def fit_linear_trends(matrix, observed):
+    """对每一行中 observed 为真的列做最小二乘直线拟合（x 为列号），返回 (斜率, 截距) 数组。"""
+    x = np.arange(matrix.shape[1], dtype=float)
+    mask = observed.astype(float)
+    n = mask.sum(axis=1)
+    sum_x = mask @ x
+    sum_xx = mask @ (x * x)
+    # 没有记录的列都是 0，整行求和即有记录的天之和
+    sum_y = matrix.sum(axis=1)
+    sum_xy = matrix @ x
+
+    denominator = n * sum_xx - sum_x ** 2
+    slopes = np.divide(n * sum_xy - sum_x * sum_y, denominator,
+                       out=np.zeros_like(sum_y), where=denominator > 0)
+    intercepts = (sum_y - slopes * sum_x) / n
+    return slopes, intercepts
+
+
+def forecast_all_series(horizon=None, history_days=None):
+    """对所有 用户×学科 序列预测全体数据最后一天之后 horizon 天的每日学习时长。
+
+    与 TrendModel 相同，只用有学习记录的天拟合，没有学习的天不按 0 分钟计入。
+    """
+    horizon = horizon or FORECAST_HORIZON
+    user_ids, subjects, first_day, matrix, observed = load_daily_matrix(history_days)
+    if first_day is None:
+        return BatchForecast(user_ids, subjects, None, np.zeros((0, horizon)), np.empty(0), np.empty(0))
+    slopes, intercepts = fit_linear_trends(matrix, observed)
+    future = np.arange(matrix.shape[1], matrix.shape[1] + horizon, dtype=float)
+    forecasts = np.maximum(intercepts[:, None] + slopes[:, None] * future[None, :], 0.0)  # 学习时长不会为负
+    start_date = datetime.fromordinal(first_day.toordinal() + matrix.shape[1])
+    return BatchForecast(user_ids, subjects, start_date, forecasts, slopes, intercepts)
+
+
+def write_cohort_forecast(path, horizon=None):
+    """所有 用户×学科 的多日预测，供汇总看板使用。"""
+    result = forecast_all_series(horizon)
+    series = [
+        {"user_id": int(user_id), "subject": subject, "slope": float(slope), "forecast": forecast.round(2).tolist()}
+        for user_id, subject, slope, forecast in zip(result.user_ids, result.subjects, result.slopes, result.forecasts)
+    ]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({
+            "start_date": result.start_date.strftime('%Y-%m-%d') if result.start_date else None,
+            "horizon": result.forecasts.shape[1],
+            "series": series,
+        }, f, ensure_ascii=False)
+
+
+# ==================== 活动会话表模型 ====================
+class ActiveSessionsModel(QtCore.QAbstractTableModel):
+    """活动会话表：按跟踪线程快照的差异增删行，定时刷新只通知时长列变化。"""
+
+    HEADERS = ("文件名", "已学习时长（分钟）")
+    DURATION_COLUMN = 1
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = []  # SessionView，顺序即表格行序
+        self.snapshot_version = None
+        self.now = time.time()
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole and orientation == QtCore.Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if role != QtCore.Qt.DisplayRole or not index.isValid():
+            return None
+        session = self.rows[index.row()]
+        if index.column() == 0:
+            return session.filename
+        return f"{(self.now - session.start_time) / 60:.2f}"  # 分钟
+
+    def apply_snapshot(self, snapshot, version):
+        """快照版本变化时按 (file, start_time) 对比出需要删除和插入的行。"""
+        if version == self.snapshot_version:
+            return
+        self.snapshot_version = version
+        current = {(session.file, session.start_time) for session in snapshot}
+        # 连续的待删除行合并为一次删除；从后往前删除，前面的行号不受影响
+        removed = [row for row, session in enumerate(self.rows) if (session.file, session.start_time) not in current]
+        while removed:
+            last = first = removed.pop()
+            while removed and removed[-1] == first - 1:
+                first = removed.pop()
+            self.beginRemoveRows(QtCore.QModelIndex(), first, last)
+            del self.rows[first:last + 1]
+            self.endRemoveRows()
+        existing = {(session.file, session.start_time) for session in self.rows}
+        added = [session for session in snapshot if (session.file, session.start_time) not in existing]
+        if added:
+            first = len(self.rows)
+            self.beginInsertRows(QtCore.QModelIndex(), first, first + len(added) - 1)
+            self.rows.extend(added)
+            self.endInsertRows()
+
+    def tick(self, now=None):
+        """只刷新时长列。"""
+        self.now = time.time() if now is None else now
+        if self.rows:
+            self.dataChanged.emit(
+                self.index(0, self.DURATION_COLUMN),
+                self.index(len(self.rows) - 1, self.DURATION_COLUMN),
+                [QtCore.Qt.DisplayRole]
+            )
 
 
 # ==================== 主GUI类 ====================
@@ -281,6 +1647,17 @@ class StudyTrackerApp(QMainWindow):
         self.tracker = None
         self.stop_event = threading.Event()
         self.chart_refresh_timer = QtCore.QTimer()
+        self.report_pool = QtCore.QThreadPool()
+        self.report_pool.setMaxThreadCount(REPORT_WORKERS)
+        self.report_request_id = 0
+        self.reports_running = 0
+        self.reports_closed = False
+        self.report_cache = ReportCache()
+        self.last_report = None  # 最后查看的图表报表，自动刷新时以 auto=True 重新调用
+        self.report_version = None  # 画布上图表对应的数据版本
+        # 跟踪线程只把通知放入队列，由通知线程合并、限流后调用 plyer
+        self.notifier = NotificationDispatcher(self.send_notification)
+        self.notifier.start()
 
         self.initUI()
 
@@ -428,10 +1805,10 @@ class StudyTrackerApp(QMainWindow):
         monthly_btn.clicked.connect(lambda: self.show_summary("month", "每月学科学习时长"))
         subject_btn = QPushButton("查看学科总学习时长分布")
         subject_btn.clicked.connect(lambda: self.show_subject_summary())
-        export_btn = QPushButton("导出学习日志为Excel")
+        export_btn = QPushButton("导出学习日志")
         export_btn.clicked.connect(self.export_log_to_excel)
         analyze_btn = QPushButton("数据分析与预测")
-        analyze_btn.clicked.connect(self.analyze_and_predict)
+        analyze_btn.clicked.connect(lambda: self.analyze_and_predict())
 
         button_layout.addWidget(daily_btn)
         button_layout.addWidget(weekly_btn)
@@ -442,10 +1819,37 @@ class StudyTrackerApp(QMainWindow):
 
         layout.addLayout(button_layout)
 
+        # 导出日期范围
+        export_layout = QHBoxLayout()
+        self.export_range_checkbox = QtWidgets.QCheckBox("只导出日期范围内的记录:")
+        self.export_start_edit = QtWidgets.QDateEdit(QtCore.QDate.currentDate().addMonths(-1))
+        self.export_end_edit = QtWidgets.QDateEdit(QtCore.QDate.currentDate())
+        for date_edit in (self.export_start_edit, self.export_end_edit):
+            date_edit.setCalendarPopup(True)
+            date_edit.setDisplayFormat("yyyy-MM-dd")
+        export_layout.addWidget(self.export_range_checkbox)
+        export_layout.addWidget(self.export_start_edit)
+        export_layout.addWidget(QLabel("至"))
+        export_layout.addWidget(self.export_end_edit)
+        export_layout.addStretch()
+        layout.addLayout(export_layout)
+
         # 图表显示区域
+        from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
         self.chart_canvas = FigureCanvas(plt.Figure(figsize=(10, 6)))
         layout.addWidget(self.chart_canvas)
 
+        # 报表计算进度
+        status_layout = QHBoxLayout()
+        self.report_status_label = QLabel()
+        self.report_progress = QtWidgets.QProgressBar()
+        self.report_progress.setRange(0, 0)  # 不确定进度，显示忙碌动画
+        self.report_progress.setMaximumWidth(200)
+        self.report_progress.hide()
+        status_layout.addWidget(self.report_status_label)
+        status_layout.addWidget(self.report_progress)
+        layout.addLayout(status_layout)
+
         widget.setLayout(layout)
         return widget
 
@@ -453,12 +1857,15 @@ class StudyTrackerApp(QMainWindow):
         widget = QWidget()
         layout = QVBoxLayout()
 
-        self.active_sessions_table = QTableWidget()
-        self.active_sessions_table.setColumnCount(2)
-        self.active_sessions_table.setHorizontalHeaderLabels(["文件名", "已学习时长（分钟）"])
+        self.active_sessions_model = ActiveSessionsModel(self)
+        self.active_sessions_table = QtWidgets.QTableView()
+        self.active_sessions_table.setModel(self.active_sessions_model)
         self.active_sessions_table.horizontalHeader().setStretchLastSection(True)
         layout.addWidget(self.active_sessions_table)
 
+        self.scan_status_label = QLabel()
+        layout.addWidget(self.scan_status_label)
+
         refresh_btn = QPushButton("刷新")
         refresh_btn.clicked.connect(self.refresh_active_sessions)
         layout.addWidget(refresh_btn)
@@ -532,7 +1939,8 @@ class StudyTrackerApp(QMainWindow):
 
     def toggle_notifications(self, state):
         # 这里可以保存通知设置到数据库，暂时简化为启用/禁用全局通知
-        if state == QtCore.Qt.Checked:
+        self.notifier.enabled = state == QtCore.Qt.Checked
+        if self.notifier.enabled:
             logging.info("桌面通知已启用")
         else:
             logging.info("桌面通知已禁用")
@@ -543,7 +1951,7 @@ class StudyTrackerApp(QMainWindow):
         self.tracker = StudyTracker(
             user_id=self.current_user['id'],
             stop_event=self.stop_event,
-            notify_callback=self.send_notification,
+            notify_callback=self.notifier.notify,
             log_callback=self.log_debug
         )
         self.tracker.start()
@@ -551,6 +1959,7 @@ class StudyTrackerApp(QMainWindow):
 
     def send_notification(self, title, message):
         try:
+            from plyer import notification
             notification.notify(
                 title=title,
                 message=message,
@@ -563,227 +1972,192 @@ class StudyTrackerApp(QMainWindow):
     def log_debug(self, message):
         logging.info(message)
 
-    def show_summary(self, group_by, title):
-        try:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            query = f'''
-                SELECT {group_by}, subject, SUM(duration)
-                FROM study_logs
-                WHERE user_id = ?
-                GROUP BY {group_by}, subject
-            '''
-            cursor.execute(query, (self.current_user['id'],))
-            results = cursor.fetchall()
-            conn.close()
-
-            if not results:
-                QMessageBox.information(self, "提示", "没有找到学习记录！")
-                return
+    def submit_report(self, label, job, on_result, supersede=True, with_progress=False):
+        """把报表任务交给线程池；新的报表请求会取代仍在计算的旧请求。
 
-            df = pd.DataFrame(results, columns=[group_by, 'subject', 'duration'])
-            summary = df.pivot_table(index=group_by, columns='subject', values='duration', aggfunc='sum').fillna(0)
-
-            # 清空之前的图表
-            self.chart_canvas.figure.clf()
-            ax = self.chart_canvas.figure.add_subplot(111)
-
-            summary.plot(kind='bar', stacked=True, ax=ax)
-            ax.set_title(title)
-            ax.set_xlabel(group_by.capitalize())
-            ax.set_ylabel("学习时长（分钟）")
-
-            # 设置中文字体
-            plt.rcParams['font.sans-serif'] = ['SimHei']  # 确保系统已安装SimHei字体
-            plt.rcParams['axes.unicode_minus'] = False
-
-            self.chart_canvas.draw()
-            logging.info(f"显示学习报告: {title}")
-        except Exception as e:
-            logging.error(f"显示学习报告时出错: {e}")
-            QMessageBox.warning(self, "错误", f"无法生成报告: {e}")
+        with_progress 为真时 job 以 (cancelled, progress) 调用，progress(完成数, 总数) 更新进度条。
+        """
+        if supersede:
+            self.report_request_id += 1
+            request_id = self.report_request_id
+            cancelled = lambda: request_id != self.report_request_id
+        else:
+            # 不被新请求取代，只在退出程序时取消
+            cancelled = lambda: self.reports_closed
+        task = ReportTask(job, cancelled, with_progress)
+        if with_progress:
+            task.signals.progress.connect(self.report_progressed)
+        task.signals.finished.connect(lambda result: on_result(result) if not cancelled() else None)
+        task.signals.failed.connect(lambda error: self.report_failed(label, error) if not cancelled() else None)
+        task.signals.done.connect(self.report_done)
+        self.reports_running += 1
+        self.report_status_label.setText(f"正在生成: {label}...")
+        self.report_progress.show()
+        self.report_pool.start(task)
+
+    def report_progressed(self, done, total):
+        self.report_progress.setRange(0, total)
+        self.report_progress.setValue(done)
+
+    def report_done(self):
+        self.reports_running -= 1
+        if self.reports_running == 0:
+            self.report_progress.setRange(0, 0)
+            self.report_progress.hide()
+            self.report_status_label.setText("")
+
+    def report_failed(self, label, error):
+        logging.error(f"生成 {label} 时出错: {error}")
+        QMessageBox.warning(self, "错误", f"无法生成{label}: {error}")
+
+    def report_figure_args(self):
+        # 按当前画布尺寸绘制，替换后无需重新排版
+        figure = self.chart_canvas.figure
+        return tuple(figure.get_size_inches()), figure.dpi
+
+    def show_report_figure(self, figure, version):
+        # 缓存中的图表可能是按其他画布尺寸绘制的
+        size, dpi = self.report_figure_args()
+        figure.set_dpi(dpi)
+        figure.set_size_inches(size, forward=False)
+        figure.set_canvas(self.chart_canvas)
+        self.chart_canvas.figure = figure
+        self.chart_canvas.draw_idle()
+        self.report_version = version
+
+    def submit_cached_report(self, label, report_type, build, on_result):
+        user_id = self.current_user['id']
+        self.submit_report(
+            label,
+            lambda cancelled: build_cached_report(self.report_cache, user_id, report_type, build, cancelled),
+            lambda payload: on_result(*payload)
+        )
 
-    def show_subject_summary(self):
-        try:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            query = '''
-                SELECT subject, SUM(duration)
-                FROM study_logs
-                WHERE user_id = ?
-                GROUP BY subject
-                ORDER BY SUM(duration) DESC
-            '''
-            cursor.execute(query, (self.current_user['id'],))
-            results = cursor.fetchall()
-            conn.close()
+    def show_summary(self, group_by, title, auto=False):
+        figsize, dpi = self.report_figure_args()
+        user_id = self.current_user['id']
+        self.last_report = lambda auto: self.show_summary(group_by, title, auto)
 
-            if not results:
-                QMessageBox.information(self, "提示", "没有找到学习记录！")
+        def on_result(version, figure):
+            if figure is None:
+                self.report_version = version
+                if not auto:
+                    QMessageBox.information(self, "提示", "没有找到学习记录！")
                 return
+            self.show_report_figure(figure, version)
+            logging.info(f"显示学习报告: {title}")
 
-            df = pd.DataFrame(results, columns=['subject', 'duration'])
-            summary = df.set_index('subject')['duration']
-
-            # 清空之前的图表
-            self.chart_canvas.figure.clf()
-            ax1 = self.chart_canvas.figure.add_subplot(121)
-            ax2 = self.chart_canvas.figure.add_subplot(122)
+        self.submit_cached_report(
+            title, group_by,
+            lambda cancelled: render_period_summary(user_id, group_by, title, figsize, dpi, cancelled),
+            on_result
+        )
 
-            summary.plot(kind='bar', ax=ax1)
-            ax1.set_title("学科学习时长分布")
-            ax1.set_xlabel("学科")
-            ax1.set_ylabel("学习时长（分钟）")
+    def show_subject_summary(self, auto=False):
+        figsize, dpi = self.report_figure_args()
+        user_id = self.current_user['id']
+        self.last_report = self.show_subject_summary
 
-            summary.plot(kind='pie', autopct='%1.1f%%', ax=ax2, legend=False)
-            ax2.set_title("学科学习时长占比")
-            ax2.set_ylabel("")
+        def on_result(version, figure):
+            if figure is None:
+                self.report_version = version
+                if not auto:
+                    QMessageBox.information(self, "提示", "没有找到学习记录！")
+                return
+            self.show_report_figure(figure, version)
+            logging.info("显示学科学习时长分布")
 
-            # 设置中文字体
-            plt.rcParams['font.sans-serif'] = ['SimHei']
-            plt.rcParams['axes.unicode_minus'] = False
+        self.submit_cached_report(
+            "学科报告", "subject",
+            lambda cancelled: render_subject_summary(user_id, figsize, dpi, cancelled),
+            on_result
+        )
 
-            self.chart_canvas.draw()
-            logging.info("显示学科学习时长分布")
-        except Exception as e:
-            logging.error(f"显示学科学习时长分布时出错: {e}")
-            QMessageBox.warning(self, "错误", f"无法生成学科报告: {e}")
+    def export_date_range(self):
+        if not self.export_range_checkbox.isChecked():
+            return None, None
+        return (self.export_start_edit.date().toString("yyyy-MM-dd"),
+                self.export_end_edit.date().toString("yyyy-MM-dd"))
 
     def export_log_to_excel(self):
-        try:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            query = '''
-                SELECT filename, subject, duration, status, start_time, end_time, date, week, month, last_access_time
-                FROM study_logs
-                WHERE user_id = ?
-            '''
-            cursor.execute(query, (self.current_user['id'],))
-            results = cursor.fetchall()
-            conn.close()
+        user_id = self.current_user['id']
+        start_date, end_date = self.export_date_range()
+        options = QFileDialog.Options()
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "导出学习日志", "",
+            "Excel Files (*.xlsx);;CSV Files (*.csv);;JSON Lines (*.jsonl)", options=options)
+        if not file_path:
+            return
 
-            if not results:
+        def on_written(exported):
+            if exported == 0:
                 QMessageBox.information(self, "提示", "没有找到学习记录！")
                 return
+            QMessageBox.information(self, "成功", f"已导出 {exported} 条学习记录到 {file_path}")
+            logging.info(f"学习日志已成功导出到 {file_path}（{exported} 条）")
+
+        # 导出不会被之后的报表请求取消
+        self.submit_report(
+            "学习日志导出",
+            lambda cancelled, progress: export_study_logs(user_id, file_path, start_date, end_date, progress, cancelled),
+            on_written,
+            supersede=False,
+            with_progress=True
+        )
 
-            df = pd.DataFrame(results, columns=[
-                "文件名", "学科", "学习时长（分钟）", "状态",
-                "开始时间", "结束时间", "日期", "周", "月",
-                "最后访问时间"
-            ])
-
-            options = QFileDialog.Options()
-            file_path, _ = QFileDialog.getSaveFileName(self, "保存学习日志为Excel", "",
-                                                       "Excel Files (*.xlsx);;All Files (*)", options=options)
-            if file_path:
-                try:
-                    # 设置中文字体
-                    plt.rcParams['font.sans-serif'] = ['SimHei']
-                    plt.rcParams['axes.unicode_minus'] = False
-                    df.to_excel(file_path, index=False)
-                    QMessageBox.information(self, "成功", f"学习日志已成功导出到 {file_path}")
-                    logging.info(f"学习日志已成功导出到 {file_path}")
-                except Exception as e:
-                    QMessageBox.warning(self, "错误", f"导出失败: {e}")
-                    logging.error(f"导出学习日志失败: {e}")
-        except Exception as e:
-            logging.error(f"导出学习日志时出错: {e}")
-            QMessageBox.warning(self, "错误", f"无法导出学习日志: {e}")
+    def analyze_and_predict(self, auto=False):
+        figsize, dpi = self.report_figure_args()
+        user_id = self.current_user['id']
+        self.last_report = self.analyze_and_predict
 
-    def analyze_and_predict(self):
-        try:
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            query = '''
-                SELECT date, SUM(duration) as daily_duration
-                FROM study_logs
-                WHERE user_id = ?
-                GROUP BY date
-                ORDER BY date
-            '''
-            cursor.execute(query, (self.current_user['id'],))
-            results = cursor.fetchall()
-            conn.close()
-
-            if len(results) < 2:
-                QMessageBox.information(self, "提示", "数据不足以进行分析和预测！")
+        def on_result(version, result):
+            if result is None:
+                self.report_version = version
+                if not auto:
+                    QMessageBox.information(self, "提示", "数据不足以进行分析和预测！")
                 return
-
-            df = pd.DataFrame(results, columns=['date', 'daily_duration'])
-            df['date'] = pd.to_datetime(df['date'])
-            df.sort_values('date', inplace=True)
-
-            # 学习习惯分析
-            total_duration = df['daily_duration'].sum()
-            avg_duration = df['daily_duration'].mean()
-            max_duration = df['daily_duration'].max()
-
-            # 学习时长趋势
-            plt.figure(figsize=(10, 5))
-            plt.plot(df['date'], df['daily_duration'], marker='o')
-            plt.title("每日学习时长趋势")
-            plt.xlabel("日期")
-            plt.ylabel("学习时长（分钟）")
-            plt.grid(True)
-
-            # 设置中文字体
-            plt.rcParams['font.sans-serif'] = ['SimHei']
-            plt.rcParams['axes.unicode_minus'] = False
-
-            plt.tight_layout()
-            plt.show()
-
-            # 未来学习时长预测
-            model = LinearRegression()
-            X = np.array((df['date'] - df['date'].min()).dt.days).reshape(-1, 1)
-            y = df['daily_duration'].values
-            model.fit(X, y)
-            next_day = df['date'].max() + pd.Timedelta(days=1)
-            X_pred = np.array([(next_day - df['date'].min()).days]).reshape(-1, 1)
-            y_pred = model.predict(X_pred)[0]
-
-            # 显示分析结果
-            analysis_text = f"""
-总学习时长: {total_duration:.2f} 分钟
-平均每日学习时长: {avg_duration:.2f} 分钟
-最高每日学习时长: {max_duration:.2f} 分钟
-
-预测 {next_day.strftime('%Y-%m-%d')} 的学习时长: {y_pred:.2f} 分钟
-"""
-            QMessageBox.information(self, "学习习惯分析与预测", analysis_text)
+            figure, analysis_text = result
+            self.show_report_figure(figure, version)
+            if not auto:
+                QMessageBox.information(self, "学习习惯分析与预测", analysis_text)
             logging.info(f"学习习惯分析与预测:\n{analysis_text}")
-        except Exception as e:
-            logging.error(f"进行学习习惯分析与预测时出错: {e}")
-            QMessageBox.warning(self, "错误", f"无法进行分析与预测: {e}")
+
+        self.submit_cached_report(
+            "学习习惯分析与预测", "analysis",
+            lambda cancelled: analyze_daily_totals(user_id, figsize, dpi, cancelled),
+            on_result
+        )
 
     def refresh_active_sessions(self):
         try:
-            self.active_sessions_table.setRowCount(0)
-            with self.tracker.active_sessions_lock:
-                for file, times in self.tracker.active_sessions.items():
-                    duration = (time.time() - times["start_time"]) / 60  # 分钟
-                    row_position = self.active_sessions_table.rowCount()
-                    self.active_sessions_table.insertRow(row_position)
-                    self.active_sessions_table.setItem(row_position, 0, QTableWidgetItem(os.path.basename(file)))
-                    self.active_sessions_table.setItem(row_position, 1, QTableWidgetItem(f"{duration:.2f}"))
+            # 读取跟踪线程发布的不可变快照，不获取跟踪线程的锁；先读版本，快照较新时下一轮会再对比一次
+            version = self.tracker.sessions_version
+            self.active_sessions_model.apply_snapshot(self.tracker.sessions_snapshot, version)
+            self.active_sessions_model.tick()
+            self.update_scan_status()
             # logging.info("活动会话已刷新")
         except Exception as e:
             logging.error(f"刷新活动会话表时出错: {e}")
 
+    def update_scan_status(self):
+        if self.tracker.watcher_backend == "inotify":
+            self.scan_status_label.setText("监视方式: inotify（事件驱动）")
+            return
+        scheduler = self.tracker.poll_scheduler
+        self.scan_status_label.setText(
+            f"监视方式: 轮询 | 当前间隔: {scheduler.interval:.1f} 秒 | "
+            f"上次扫描: {scheduler.last_scan_seconds * 1000:.0f} 毫秒 | 扫描占用: {scheduler.duty_cycle:.1%}"
+        )
+
     def refresh_charts(self):
         try:
-            # 选择当前激活的标签
+            # 只在学习报告标签可见、没有报表在计算且数据版本变化时重新生成最后查看的报告
             current_tab = self.stack.currentWidget().findChild(QTabWidget).currentWidget()
-            if current_tab == self.report_tab:
-                # 自动刷新当前显示的报告
-                current_index = self.stack.currentWidget().findChild(QTabWidget).currentIndex()
-                if current_index == 0:  # 学习报告
-                    # 根据需要自动刷新，可以存储最后一个查看的报告类型
-                    pass
-                elif current_index == 1:  # 活动会话
-                    pass
-                elif current_index == 2:  # 设置
-                    pass
+            if current_tab != self.report_tab or self.last_report is None or self.reports_running:
+                return
+            if get_data_version(self.current_user['id']) == self.report_version:
+                return
+            self.last_report(auto=True)
             logging.info("图表已自动刷新")
         except Exception as e:
             logging.error(f"自动刷新图表时出错: {e}")
@@ -796,6 +2170,11 @@ class StudyTrackerApp(QMainWindow):
 
     def cleanup(self):
         try:
+            # 取消仍在排队或计算中的报表
+            self.report_request_id += 1
+            self.reports_closed = True
+            self.report_pool.clear()
+            self.report_pool.waitForDone(5000)
             self.stop_event.set()
             if self.tracker and self.tracker.is_alive():
                 self.tracker.join(timeout=5)
@@ -805,19 +2184,25 @@ class StudyTrackerApp(QMainWindow):
                     logging.info("跟踪线程已成功停止。")
             # 处理退出时仍在进行的会话
             if self.tracker:
+                records = []
                 with self.tracker.active_sessions_lock:
-                    for file, times in list(self.tracker.active_sessions.items()):
-                        duration = (time.time() - times["start_time"]) / 60
+                    for file, session in list(self.tracker.active_sessions.items()):
+                        duration = (time.time() - session.start_time) / 60
                         if duration >= LEARNING_THRESHOLD:
-                            self.tracker.log_study_time(file, times["start_time"], time.time())
-                            self.send_notification(
+                            records.append(self.tracker.study_record(session, time.time()))
+                            self.notifier.notify(
                                 "停止学习",
-                                f"退出时停止学习: {os.path.basename(file)}，时长 {duration:.2f} 分钟"
+                                f"退出时停止学习: {session.filename}，时长 {duration:.2f} 分钟",
+                                session.filename
                             )
                             self.log_debug(f"退出时停止学习: {file} at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
                             logging.info(
                                 f"🛑 退出时停止学习: {file} -> {duration:.2f} 分钟 于 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
                             del self.tracker.active_sessions[file]
+                self.tracker.submit_records(records)
+                # 写入队列中剩余的学习记录
+                self.tracker.db_writer.close()
+            self.notifier.close()
         except Exception as e:
             logging.error(f"清理资源时出错: {e}")
 
@@ -838,10 +2223,30 @@ class StudyTrackerApp(QMainWindow):
 
 # ==================== 主程序启动 ====================
 def main():
+    parser = argparse.ArgumentParser(description="学习进度跟踪系统")
+    parser.add_argument("--rebuild-rollups", action="store_true", help="从 study_logs 重建汇总表后退出")
+    parser.add_argument("--render-reports", metavar="DIR", help="不启动界面，为所有用户渲染报表到 DIR 后退出")
+    parser.add_argument("--formats", default=",".join(RENDER_FORMATS), help="批量渲染的图片格式，逗号分隔")
+    parser.add_argument("--workers", type=int, help="批量渲染的进程数，默认等于 CPU 核数")
+    parser.add_argument("--force", action="store_true", help="批量渲染时忽略数据版本，重新渲染所有用户")
+    parser.add_argument("--log-format", choices=("text", "jsonl"), default=LOG_FORMAT, help="日志文件格式")
+    args, qt_args = parser.parse_known_args()
+
+    setup_logging(args.log_format)
+
     initialize_database()
-    app = QApplication(sys.argv)
+    if args.rebuild_rollups:
+        rebuild_rollups()
+        return
+    if args.render_reports:
+        render_all_reports(args.render_reports, tuple(args.formats.split(",")), args.workers, args.force)
+        return
+    app = QApplication(sys.argv[:1] + qt_args)
     window = StudyTrackerApp()
     window.show()
+    logging.info(f"登录窗口已显示，启动耗时 {time.perf_counter() - STARTUP_TIME:.2f} 秒")
+    # 用户输入用户名期间在后台加载 pandas/numpy
+    threading.Thread(target=preload_heavy_modules, name="ModulePreloader", daemon=True).start()
     sys.exit(app.exec_())
 
 
@@ -1,160 +1,584 @@
 import os
+import io
+import csv
 import time
+import json
+import logging
+import numpy as np
 import pandas as pd
 import threading
-from datetime import datetime
+from datetime import date, datetime, timedelta
 import matplotlib.pyplot as plt
+from studtScan import StudySession, SessionExpiryQueue, PollScheduler, MultiRootScanner, WatchEventRouter, create_watcher
+from studtExport import export_writer_class, write_export
 
 # ==================== 配置部分 ====================
-ROOT_DIR = r'D:\课件\学科ppt'  # 根目录
+ROOT_DIRS = [r'D:\课件\学科ppt']  # 根目录列表，可同时包含本地磁盘与网络挂载
 LOG_FILE = r'D:\study_progress\study_log.csv'  # 学习日志路径
-CHECK_INTERVAL = 2  # 文件检查间隔（秒）
+CHECK_INTERVAL = 2  # 有活动时的文件检查间隔（秒）
+MAX_CHECK_INTERVAL = 30  # 没有活动会话时轮询间隔逐步放宽到的上限（秒）
+CHECK_BACKOFF_FACTOR = 2  # 空闲时每轮轮询间隔的放大倍数
+SCAN_DUTY_CYCLE_LIMIT = 0.1  # 扫描耗时占墙钟时间的最大比例
 LEARNING_THRESHOLD = 0.1  # 最小学习时长（分钟）
 INACTIVITY_THRESHOLD = 300  # 不活动超时时间（秒），设置为5分钟
 SUPPORTED_EXTENSIONS = ['.pdf', '.docx', '.pptx']  # 支持的文件类型
+WATCHER_BACKEND = "auto"  # 文件监视后端: "auto"（Linux 下优先 inotify）、"inotify" 或 "polling"
+SCAN_WORKERS = 4  # 并行扫描根目录的最大线程数
+ROOT_SCAN_TIMEOUT = 5  # 单个根目录每轮扫描的等待上限（秒），超时的根目录本轮跳过
+ROOT_SCAN_TIMEOUTS = {}  # 按根目录覆盖扫描超时，例如 {r'\\nas\课件': 30}
+LOG_FLUSH_SIZE = 20  # 缓冲的学习记录达到该条数时写入日志
+LOG_FLUSH_INTERVAL = 30  # 缓冲的学习记录最长等待写入时间（秒）
+LOG_COLUMNS = [
+    "文件名", "学科", "学习时长（分钟）", "状态",
+    "开始时间", "结束时间", "日期", "周", "月",
+    "最后访问时间"
+]
+DURATION_COLUMN = "学习时长（分钟）"
+REPORT_CHUNK_SIZE = 200_000  # 生成报告时每次读取的日志行数
+REPORT_MERGE_EVERY = 32  # 累积多少块的部分聚合结果后合并一次
+LOG_BACKEND = "csv"  # 学习日志存储格式: "csv" 或 "columnar"（列式二进制，体积小、报表加载快）
+COLUMNAR_LOG_DIR = r'D:\study_progress\study_log_columns'  # 列式日志目录
+EXPORT_PATH = r'D:\study_progress\study_log.xlsx'  # 默认导出路径，扩展名决定格式（.xlsx/.csv/.jsonl）
+EXPORT_CHUNK_SIZE = 50_000  # 导出时每块处理的行数
 
 # Matplotlib 字体设置（解决中文字符无法显示的问题）
 plt.rcParams['font.sans-serif'] = ['SimHei']  # 支持中文
 plt.rcParams['axes.unicode_minus'] = False  # 支持负号显示
 
 
+# ==================== 日志写入 ====================
+class StudyLogWriter:
+    """只追加的学习日志写入器：缓冲已结束的会话并批量写入，从不重新读取已有日志。"""
+
+    def __init__(self, path, flush_size=LOG_FLUSH_SIZE, flush_interval=LOG_FLUSH_INTERVAL):
+        self.path = path
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.buffer = []
+        self.lock = threading.Lock()
+        self.last_flush = time.time()
+        self.checked_tail = False
+
+    def ensure_header(self):
+        # 先写临时文件再原子替换，避免崩溃时留下只有半个表头的日志
+        if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            return False
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+            csv.writer(f).writerow(LOG_COLUMNS)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self.checked_tail = True
+        return True
+
+    def append(self, row):
+        with self.lock:
+            self.buffer.append(row)
+            due = (len(self.buffer) >= self.flush_size
+                   or time.time() - self.last_flush >= self.flush_interval)
+        if due:
+            self.try_flush()
+
+    def flush_if_due(self):
+        with self.lock:
+            due = self.buffer and time.time() - self.last_flush >= self.flush_interval
+        if due:
+            self.try_flush()
+
+    def try_flush(self):
+        # 跟踪循环中的定时写入：失败时记录保留在缓冲区，下个写入周期重试
+        try:
+            self.flush()
+        except OSError as e:
+            print(f"⚠️ 写入学习日志失败，{len(self.buffer)} 条记录将在稍后重试: {e}")
+
+    def append_session(self, filename, subject, start_time, end_time, logged_at):
+        duration = (end_time - start_time) / 60  # 转换为分钟
+        status = "已完成" if duration >= 15 else "进行中"
+        self.append([
+            filename, subject, round(duration, 2), status,
+            datetime.fromtimestamp(start_time).strftime("%Y-%m-%d %H:%M:%S"),
+            datetime.fromtimestamp(end_time).strftime("%Y-%m-%d %H:%M:%S"),
+            logged_at.strftime("%Y-%m-%d"), logged_at.strftime("%Y-%U"), logged_at.strftime("%Y-%m"),
+            logged_at.strftime("%Y-%m-%d %H:%M:%S")
+        ])
+
+    def flush(self):
+        with self.lock:
+            rows, self.buffer = self.buffer, []
+            self.last_flush = time.time()
+            if not rows:
+                return 0
+            try:
+                self.ensure_header()
+                self.write_rows(rows)
+            except BaseException:
+                # 例如 Excel 打开日志时的 PermissionError：记录放回缓冲区最前面，保持原有顺序
+                self.buffer[:0] = rows
+                raise
+            return len(rows)
+
+    def write_rows(self, rows):
+        with open(self.path, "a+b") as f:
+            if not self.checked_tail:
+                # 上次写入中途崩溃时，最后一行可能没有换行符
+                f.seek(0, os.SEEK_END)
+                if f.tell() > 0:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        f.write(b"\n")
+                self.checked_tail = True
+            text = io.StringIO()
+            csv.writer(text).writerows(rows)
+            f.write(text.getvalue().encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+
+
+# ==================== 列式日志存储 ====================
+class ColumnarStudyLog(StudyLogWriter):
+    """列式学习日志：文件名/学科字典编码，时间存为毫秒整数，每列一个可内存映射的二进制文件。"""
+
+    COLUMNS = {
+        "filename": np.dtype("<i4"),
+        "subject": np.dtype("<i4"),
+        "start_ms": np.dtype("<i8"),
+        "end_ms": np.dtype("<i8"),
+        "logged_ms": np.dtype("<i8"),
+    }
+    DICTIONARIES = ("filename", "subject")
+    PERIOD_FORMATS = {"日期": "%Y-%m-%d", "周": "%Y-%U", "月": "%Y-%m"}
+    EPOCH_DATE = date(1970, 1, 1)
+    DAY_MS = 86400 * 1000
+    TIME_BUCKET_MS = 15 * 60 * 1000  # 所有时区偏移都是15分钟的整数倍，同一桶内本地日期相同
+
+    def __init__(self, directory, flush_size=LOG_FLUSH_SIZE, flush_interval=LOG_FLUSH_INTERVAL):
+        super().__init__(directory, flush_size, flush_interval)
+        self.directory = directory
+        self.dictionaries = None  # 字典名 -> (值列表, 值 -> 编码)
+
+    def column_path(self, name):
+        return os.path.join(self.directory, f"{name}.bin")
+
+    def dictionary_path(self, name):
+        return os.path.join(self.directory, f"{name}.dict")
+
+    def ensure_header(self):
+        if os.path.isdir(self.directory):
+            return False
+        os.makedirs(self.directory)
+        return True
+
+    def load_dictionaries(self):
+        if self.dictionaries is None:
+            self.dictionaries = {}
+            for name in self.DICTIONARIES:
+                values = []
+                if os.path.exists(self.dictionary_path(name)):
+                    with open(self.dictionary_path(name), encoding="utf-8") as f:
+                        values = [json.loads(line) for line in f if line.endswith("\n")]
+                self.dictionaries[name] = (values, {value: code for code, value in enumerate(values)})
+        return self.dictionaries
+
+    @property
+    def row_count(self):
+        sizes = []
+        for name, dtype in self.COLUMNS.items():
+            path = self.column_path(name)
+            sizes.append(os.path.getsize(path) // dtype.itemsize if os.path.exists(path) else 0)
+        return min(sizes)
+
+    def repair(self):
+        # 追加中途崩溃时字典可能留下半行、各列长度可能不一致，截断到最后一个完整位置
+        for name in self.DICTIONARIES:
+            path = self.dictionary_path(name)
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    content = f.read()
+                if content and not content.endswith(b"\n"):
+                    os.truncate(path, content.rfind(b"\n") + 1)
+        rows = self.row_count
+        for name, dtype in self.COLUMNS.items():
+            path = self.column_path(name)
+            if os.path.exists(path) and os.path.getsize(path) != rows * dtype.itemsize:
+                os.truncate(path, rows * dtype.itemsize)
+        return rows
+
+    def append_session(self, filename, subject, start_time, end_time, logged_at):
+        self.append((filename, subject, int(start_time * 1000), int(end_time * 1000),
+                     int(logged_at.timestamp() * 1000)))
+
+    def write_rows(self, rows):
+        if not self.checked_tail:
+            self.repair()
+            self.checked_tail = True
+        dictionaries = self.load_dictionaries()
+        encoded = {name: [] for name in self.COLUMNS}
+        new_codes = {name: {} for name in self.DICTIONARIES}  # 尚未写入字典文件的新值 -> 编码
+        for row in rows:
+            for name, value in zip(self.DICTIONARIES, row[:2]):
+                values, codes = dictionaries[name]
+                code = codes.get(value)
+                if code is None:
+                    code = new_codes[name].setdefault(value, len(values) + len(new_codes[name]))
+                encoded[name].append(code)
+            encoded["start_ms"].append(row[2])
+            encoded["end_ms"].append(row[3])
+            encoded["logged_ms"].append(row[4])
+        try:
+            # 先写字典再写列，保证列中的编码总能在字典中找到；字典文件写入成功后才更新内存中的字典
+            for name, pending in new_codes.items():
+                if pending:
+                    with open(self.dictionary_path(name), "a", encoding="utf-8") as f:
+                        f.writelines(json.dumps(value, ensure_ascii=False) + "\n" for value in pending)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    values, codes = dictionaries[name]
+                    values.extend(pending)
+                    codes.update(pending)
+            for name, dtype in self.COLUMNS.items():
+                with open(self.column_path(name), "ab") as f:
+                    np.asarray(encoded[name], dtype=dtype).tofile(f)
+                    f.flush()
+                    os.fsync(f.fileno())
+        except BaseException:
+            # 文件可能只写了一部分：下次写入前重新截断到完整位置，并按截断后的文件重新加载字典
+            self.checked_tail = False
+            self.dictionaries = None
+            raise
+
+    def open_columns(self):
+        # 只读内存映射，报表直接在映射上计算，不解析文本
+        rows = self.row_count
+        columns = {}
+        for name, dtype in self.COLUMNS.items():
+            if rows == 0:
+                columns[name] = np.empty(0, dtype=dtype)
+            else:
+                columns[name] = np.memmap(self.column_path(name), dtype=dtype, mode="r", shape=(rows,))
+        return columns
+
+    def local_days(self, logged_ms):
+        # 每行的本地日期序号（自 1970-01-01 起的天数）；只对不同的 UTC 日期查询时区偏移
+        utc_days, inverse = np.unique(logged_ms // self.DAY_MS, return_inverse=True)
+        day_start = [time.localtime(int(day) * 86400).tm_gmtoff * 1000 for day in utc_days]
+        day_end = [time.localtime(int(day) * 86400 + 86399).tm_gmtoff * 1000 for day in utc_days]
+        offsets = np.array(day_start, dtype=np.int64)[inverse]
+        # 夏令时切换当天偏移不固定，按15分钟桶逐一查询
+        changing = (np.array(day_start) != np.array(day_end))[inverse]
+        if changing.any():
+            buckets, bucket_inverse = np.unique(logged_ms[changing] // self.TIME_BUCKET_MS, return_inverse=True)
+            bucket_offsets = [time.localtime(int(b) * self.TIME_BUCKET_MS // 1000).tm_gmtoff * 1000
+                              for b in buckets]
+            offsets[changing] = np.array(bucket_offsets, dtype=np.int64)[bucket_inverse]
+        return (logged_ms + offsets) // self.DAY_MS
+
+    def period_codes(self, logged_ms, formats):
+        # 只对出现过的日期做格式化，再映射回每一行
+        days, inverse = np.unique(self.local_days(logged_ms), return_inverse=True)
+        dates = [self.EPOCH_DATE + timedelta(days=int(day)) for day in days]
+        result = {}
+        for key in formats:
+            labels = np.array([d.strftime(self.PERIOD_FORMATS[key]) for d in dates])
+            categories, label_codes = np.unique(labels, return_inverse=True)
+            result[key] = pd.Categorical.from_codes(label_codes[inverse], categories=categories)
+        return result
+
+    def frame(self, columns):
+        self.flush()
+        return self.build_frame(self.open_columns(), columns)
+
+    def iter_frames(self, columns, chunksize=None):
+        # 按行区间切分内存映射，每次只物化一块
+        self.flush()
+        data = self.open_columns()
+        chunksize = chunksize or REPORT_CHUNK_SIZE
+        for start in range(0, len(data["start_ms"]), chunksize):
+            yield self.build_frame({name: column[start:start + chunksize] for name, column in data.items()}, columns)
+
+    def build_frame(self, data, columns):
+        dictionaries = self.load_dictionaries()
+        frame = {}
+        periods = [c for c in columns if c in self.PERIOD_FORMATS]
+        if periods:
+            frame.update(self.period_codes(data["logged_ms"], periods))
+        for column in columns:
+            if column in frame:
+                continue
+            if column == "文件名":
+                frame[column] = pd.Categorical.from_codes(data["filename"], categories=dictionaries["filename"][0])
+            elif column == "学科":
+                frame[column] = pd.Categorical.from_codes(data["subject"], categories=dictionaries["subject"][0])
+            elif column == DURATION_COLUMN:
+                # 与 CSV 后端写入的 round(时长, 2) 一致，两种后端的报表与导出结果相同
+                frame[column] = np.round((data["end_ms"] - data["start_ms"]) / 60000, 2)
+            elif column == "状态":
+                frame[column] = np.where((data["end_ms"] - data["start_ms"]) >= 15 * 60000, "已完成", "进行中")
+            else:
+                source = {"开始时间": "start_ms", "结束时间": "end_ms", "最后访问时间": "logged_ms"}[column]
+                frame[column] = [datetime.fromtimestamp(ms / 1000).strftime("%Y-%m-%d %H:%M:%S")
+                                 for ms in data[source].tolist()]
+        return pd.DataFrame(frame, columns=list(columns))
+
+    def aggregate(self, keys):
+        summary = self.frame(list(keys) + [DURATION_COLUMN]).groupby(
+            list(keys), observed=True)[DURATION_COLUMN].sum()
+        # 分类索引转回普通字符串并排序，结果与 CSV 后端一致
+        if isinstance(summary.index, pd.MultiIndex):
+            summary.index = pd.MultiIndex.from_arrays(
+                [summary.index.get_level_values(i).astype(str) for i in range(summary.index.nlevels)],
+                names=summary.index.names)
+        else:
+            summary.index = summary.index.astype(str)
+        return summary.sort_index()
+
+    def import_csv(self, csv_path, chunksize=None):
+        # 把已有的 CSV 日志导入列式存储
+        def to_ms(text):
+            return int(datetime.strptime(text, "%Y-%m-%d %H:%M:%S").timestamp() * 1000)
+
+        imported = 0
+        for chunk in pd.read_csv(csv_path, usecols=["文件名", "学科", "开始时间", "结束时间", "最后访问时间"],
+                                 dtype=str, chunksize=chunksize or REPORT_CHUNK_SIZE):
+            for filename, subject, start, end, logged in chunk.itertuples(index=False):
+                self.append((filename, subject, to_ms(start), to_ms(end), to_ms(logged)))
+                imported += 1
+        self.flush()
+        return imported
+
+
+def create_log_writer():
+    if LOG_BACKEND == "columnar":
+        return ColumnarStudyLog(COLUMNAR_LOG_DIR)
+    return StudyLogWriter(LOG_FILE)
+
+
+log_writer = create_log_writer()
+
+
 # ==================== 初始化日志 ====================
 def initialize_log():
     if not os.path.exists(os.path.dirname(LOG_FILE)):
         os.makedirs(os.path.dirname(LOG_FILE))
-    if not os.path.exists(LOG_FILE):
-        df = pd.DataFrame(columns=[
-            "文件名", "学科", "学习时长（分钟）", "状态",
-            "开始时间", "结束时间", "日期", "周", "月",
-            "最后访问时间"
-        ])
-        df.to_csv(LOG_FILE, index=False)
+    if log_writer.ensure_header():
         print("✅ 学习日志初始化完成！")
 
 
 # ==================== 文件检测与学习时长记录 ====================
-def get_all_supported_files():
-    supported_files = {}
-    for root, _, files in os.walk(ROOT_DIR):
-        for file in files:
-            if any(file.endswith(ext) for ext in SUPPORTED_EXTENSIONS):
-                file_path = os.path.join(root, file)
-                try:
-                    supported_files[file_path] = os.path.getatime(file_path)
-                except FileNotFoundError:
-                    continue
-    return supported_files
-
-
-def track_study_time(stop_event, active_sessions_lock, active_sessions):
-    print("🚀 开始追踪学习时长... (按 Ctrl+C 停止)")
-    all_files = get_all_supported_files()
+watcher_backend = None  # 跟踪线程实际使用的监视方式："inotify" 或 "polling"
 
-    while not stop_event.is_set():
-        current_time = time.time()
-        current_files = get_all_supported_files()
 
-        # 检测文件波动
-        for file, last_atime in current_files.items():
-            current_atime = last_atime
-            if file not in all_files:
-                # 新文件被添加
-                all_files[file] = current_atime
+def print_scan_message(level, message):
+    print(f"{'❌' if level >= logging.ERROR else '⚠️' if level >= logging.WARNING else '👀'} {message}")
 
-            if current_atime != all_files[file]:
-                with active_sessions_lock:
-                    if file not in active_sessions:
-                        # 新的学习会话开始
-                        active_sessions[file] = {
-                            "start_time": current_time,
-                            "last_fluctuation": current_time
-                        }
-                        print(f"🟢 开始学习: {file} 于 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-                    else:
-                        # 更新最后一次波动时间
-                        active_sessions[file]["last_fluctuation"] = current_time
-                all_files[file] = current_atime
-
-        # 检测不活动超时
-        with active_sessions_lock:
-            files_to_remove = []
-            for file, times in active_sessions.items():
-                last_fluctuation = times["last_fluctuation"]
-                if current_time - last_fluctuation > INACTIVITY_THRESHOLD:
-                    duration = (last_fluctuation - times["start_time"]) / 60  # 转换为分钟
-                    if duration >= LEARNING_THRESHOLD:
-                        log_study_time(file, times["start_time"], last_fluctuation)
-                        print(
-                            f"🛑 停止学习: {file} -> {duration:.2f} 分钟 于 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-                    files_to_remove.append(file)
-            for file in files_to_remove:
-                del active_sessions[file]
-
-        # 更新 all_files 字典，移除已删除的文件
-        removed_files = set(all_files.keys()) - set(current_files.keys())
-        for file in removed_files:
-            with active_sessions_lock:
-                if file in active_sessions:
-                    times = active_sessions[file]
-                    duration = (times["last_fluctuation"] - times["start_time"]) / 60
-                    if duration >= LEARNING_THRESHOLD:
-                        log_study_time(file, times["start_time"], times["last_fluctuation"])
-                        print(
-                            f"🛑 文件被删除或移动，停止学习: {file} -> {duration:.2f} 分钟 于 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-                    del active_sessions[file]
-            del all_files[file]
 
-        time.sleep(CHECK_INTERVAL)
+def create_root_scanner():
+    return MultiRootScanner(ROOT_DIRS, SUPPORTED_EXTENSIONS, SCAN_WORKERS, ROOT_SCAN_TIMEOUT, ROOT_SCAN_TIMEOUTS,
+                            log=print_scan_message)
+
+
+def create_poll_scheduler():
+    return PollScheduler(CHECK_INTERVAL, MAX_CHECK_INTERVAL, CHECK_BACKOFF_FACTOR, SCAN_DUTY_CYCLE_LIMIT)
+
+
+def get_all_supported_files(scanner=None):
+    if scanner is None:
+        scanner = create_root_scanner()
+    return scanner.scan()
+
+
+def track_study_time(stop_event, active_sessions_lock, active_sessions, scheduler=None):
+    global watcher_backend
+    print("🚀 开始追踪学习时长... (按 Ctrl+C 停止)")
+    if scheduler is None:
+        scheduler = create_poll_scheduler()
+    scanner = create_root_scanner()
+    all_files = get_all_supported_files(scanner)
+    expiry_queue = SessionExpiryQueue(INACTIVITY_THRESHOLD)
+    watcher = create_watcher(WATCHER_BACKEND, scanner, SUPPORTED_EXTENSIONS, log=print_scan_message)
+
+    if watcher is not None:
+        watcher_backend = "inotify"
+        watch_study_time(watcher, scanner, expiry_queue, stop_event, active_sessions_lock, active_sessions)
+    else:
+        watcher_backend = "polling"
+        while not stop_event.is_set():
+            scan_start = time.perf_counter()
+            try:
+                changed = track_once(scanner, all_files, expiry_queue, active_sessions_lock, active_sessions)
+            except Exception as e:
+                # 单轮出错不终止跟踪线程，下一轮继续
+                print(f"❌ 追踪学习时长时出错: {e}")
+                changed = []
+            with active_sessions_lock:
+                active = bool(changed or active_sessions)
+            # 用 wait 代替 sleep，退避到较长间隔时也能及时响应停止
+            stop_event.wait(scheduler.next_interval(time.perf_counter() - scan_start, active))
+    scanner.close()
 
 
-def log_study_time(file_path, start_time, end_time):
-    duration = (end_time - start_time) / 60  # 转换为分钟
+def watch_study_time(watcher, scanner, expiry_queue, stop_event, active_sessions_lock, active_sessions):
+    """事件驱动的跟踪循环：文件被打开或读取时立即开始或延续会话，不再轮询扫描整棵目录树。"""
+    router = WatchEventRouter(scanner)
     try:
-        df = pd.read_csv(LOG_FILE)
-    except pd.errors.EmptyDataError:
-        df = pd.DataFrame(columns=[
-            "文件名", "学科", "学习时长（分钟）", "状态",
-            "开始时间", "结束时间", "日期", "周", "月",
-            "最后访问时间"
-        ])
+        while not stop_event.is_set():
+            try:
+                # 没有事件时最多等待 CHECK_INTERVAL 秒，按时结束不活动的会话
+                for kind, file, event_time, file_id in router.poll(watcher, CHECK_INTERVAL):
+                    if kind == "access":
+                        record_file_activity(scanner.registry, file_id, event_time, expiry_queue,
+                                             active_sessions_lock, active_sessions)
+                    elif kind == "removed":
+                        end_removed_sessions(file, active_sessions_lock, active_sessions)
+                expire_sessions(expiry_queue, time.time(), active_sessions_lock, active_sessions)
+                log_writer.flush_if_due()
+            except Exception as e:
+                print(f"❌ 追踪学习时长时出错: {e}")
+    finally:
+        watcher.close()
+
+
+def track_once(scanner, all_files, expiry_queue, active_sessions_lock, active_sessions):
+    """扫描一轮：开始、延续、结束学习会话，返回本轮有波动的文件编号。"""
+    current_time = time.time()
+    # 一次遍历得到变化量，atime 直接取自扫描时的 stat 结果
+    added, changed, removed_files = scanner.diff()
+
+    # 检测文件波动（新增文件已由扫描器登记到注册表）
+    for file_id in changed:
+        record_file_activity(all_files, file_id, current_time, expiry_queue, active_sessions_lock, active_sessions)
+
+    # 检测不活动超时
+    expire_sessions(expiry_queue, current_time, active_sessions_lock, active_sessions)
+
+    # 结束已删除文件的会话（扫描器已从注册表中移除）
+    for file in removed_files:
+        end_removed_sessions(file, active_sessions_lock, active_sessions)
+
+    log_writer.flush_if_due()
+    return changed
+
+
+def record_file_activity(all_files, file_id, current_time, expiry_queue, active_sessions_lock, active_sessions):
+    file = all_files.path(file_id)
+    with active_sessions_lock:
+        session = active_sessions.get(file)
+        if session is None:
+            # 新的学习会话开始
+            session = StudySession(all_files.name(file_id), all_files.subject(file_id), current_time)
+            active_sessions[file] = session
+            expiry_queue.schedule(file, session)
+            print(f"🟢 开始学习: {file} 于 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        else:
+            # 更新最后一次波动时间
+            session.last_fluctuation = current_time
 
-    filename = os.path.basename(file_path)
-    subject = file_path.split(os.sep)[-2] if len(file_path.split(os.sep)) >= 2 else "未知"
-    now = datetime.now()
-    date = now.strftime("%Y-%m-%d")
-    week = now.strftime("%Y-%U")
-    month = now.strftime("%Y-%m")
-    start_datetime = datetime.fromtimestamp(start_time).strftime("%Y-%m-%d %H:%M:%S")
-    end_datetime = datetime.fromtimestamp(end_time).strftime("%Y-%m-%d %H:%M:%S")
-
-    status = "已完成" if duration >= 15 else "进行中"
-
-    new_entry = pd.DataFrame({
-        "文件名": [filename],
-        "学科": [subject],
-        "学习时长（分钟）": [round(duration, 2)],
-        "状态": [status],
-        "开始时间": [start_datetime],
-        "结束时间": [end_datetime],
-        "日期": [date],
-        "周": [week],
-        "月": [month],
-        "最后访问时间": [now.strftime("%Y-%m-%d %H:%M:%S")]
-    })
-
-    df = pd.concat([df, new_entry], ignore_index=True)
-    df.to_csv(LOG_FILE, index=False)
+
+def expire_sessions(expiry_queue, current_time, active_sessions_lock, active_sessions):
+    with active_sessions_lock:
+        # 只处理截止时间已到的会话，不再每轮遍历全部会话
+        for file in expiry_queue.pop_expired(active_sessions, current_time):
+            session = active_sessions.pop(file)
+            last_fluctuation = session.last_fluctuation
+            duration = (last_fluctuation - session.start_time) / 60  # 转换为分钟
+            if duration >= LEARNING_THRESHOLD:
+                log_study_time(session, last_fluctuation)
+                print(
+                    f"🛑 停止学习: {file} -> {duration:.2f} 分钟 于 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+
+def end_removed_sessions(path, active_sessions_lock, active_sessions):
+    # path 可能是文件，也可能是整个被删除或移走的目录（inotify 只报告一次）
+    prefix = path + os.sep
+    with active_sessions_lock:
+        for file in [f for f in active_sessions if f == path or f.startswith(prefix)]:
+            session = active_sessions.pop(file)
+            duration = (session.last_fluctuation - session.start_time) / 60
+            if duration >= LEARNING_THRESHOLD:
+                log_study_time(session, session.last_fluctuation)
+                print(
+                    f"🛑 文件被删除或移动，停止学习: {file} -> {duration:.2f} 分钟 于 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+
+def log_study_time(session, end_time):
+    log_writer.append_session(session.filename, session.subject, session.start_time, end_time, datetime.now())
+
+
+# ==================== 流式导出 ====================
+def iter_export_chunks(start_date=None, end_date=None, chunksize=None):
+    chunksize = chunksize or EXPORT_CHUNK_SIZE
+    if isinstance(log_writer, ColumnarStudyLog):
+        chunks = log_writer.iter_frames(LOG_COLUMNS, chunksize)
+    else:
+        log_writer.flush()
+        chunks = iter_log_chunks(LOG_COLUMNS, chunksize)
+    for chunk in chunks:
+        if start_date or end_date:
+            dates = chunk["日期"].astype(str)
+            keep = np.ones(len(chunk), dtype=bool)
+            if start_date:
+                keep &= (dates >= start_date).to_numpy()
+            if end_date:
+                keep &= (dates <= end_date).to_numpy()
+            chunk = chunk[keep]
+        yield chunk
+
+
+def export_study_logs(path, start_date=None, end_date=None, progress=None):
+    """把 [start_date, end_date] 内的学习记录按块流式导出到 path（按扩展名选择格式），返回导出行数。
+
+    progress(已导出行数, 总行数) 每块调用一次，CSV 日志的总行数未知时为 None；没有记录时不创建文件。
+    """
+    export_writer_class(path)
+    # 只有不筛选日期的列式日志能事先知道总行数
+    total = log_writer.row_count if isinstance(log_writer, ColumnarStudyLog) and not (start_date or end_date) else None
+    # 分类列和 NumPy 标量转为普通 Python 值
+    chunks = (list(chunk.astype(object).itertuples(index=False, name=None))
+              for chunk in iter_export_chunks(start_date, end_date))
+    return write_export(path, LOG_COLUMNS, chunks, total, progress)
 
 
 # ==================== 学习报告生成 ====================
-def generate_report():
+def iter_log_chunks(columns, chunksize=None):
+    # 按块读取日志，只解析需要的列；分组列按字符串读取，避免 "2024-03" 之类被推断成其他类型
+    dtype = {column: str for column in columns if column != DURATION_COLUMN}
     try:
-        df = pd.read_csv(LOG_FILE)
+        yield from pd.read_csv(LOG_FILE, usecols=columns, dtype=dtype,
+                               chunksize=chunksize or REPORT_CHUNK_SIZE)
     except pd.errors.EmptyDataError:
-        print("📭 没有找到学习记录！")
         return
 
-    if df.empty:
+
+def aggregate_log(keys, chunksize=None):
+    if isinstance(log_writer, ColumnarStudyLog):
+        return log_writer.aggregate(keys)
+    # 每块先各自 groupby 求和，再合并部分结果；内存占用只与分组数和块大小有关
+    partials = []
+    for chunk in iter_log_chunks(list(keys) + [DURATION_COLUMN], chunksize):
+        partials.append(chunk.groupby(list(keys))[DURATION_COLUMN].sum())
+        if len(partials) >= REPORT_MERGE_EVERY:
+            partials = [merge_partials(partials, keys)]
+    if not partials:
+        return pd.Series(dtype=float, name=DURATION_COLUMN)
+    return merge_partials(partials, keys)
+
+
+def merge_partials(partials, keys):
+    return pd.concat(partials).groupby(level=list(range(len(keys)))).sum()
+
+
+def log_has_records():
+    if isinstance(log_writer, ColumnarStudyLog):
+        return log_writer.row_count > 0
+    for chunk in iter_log_chunks([DURATION_COLUMN], chunksize=1):
+        return not chunk.empty
+    return False
+
+
+def generate_report():
+    log_writer.flush()
+    if not log_has_records():
         print("📭 没有找到学习记录！")
         return
 
@@ -164,31 +588,34 @@ def generate_report():
         print("2. 查看每周学科学习时长")
         print("3. 查看每月学科学习时长")
         print("4. 查看学科总学习时长分布")
-        print("5. 导出学习日志为Excel")
+        print("5. 导出学习日志（Excel/CSV/JSONL）")
         print("6. 返回主菜单")
         choice = input("请输入选项 (1/2/3/4/5/6): ")
 
         if choice == "1":
-            show_summary(df, "日期", "每日学科学习时长")
+            show_summary("日期", "每日学科学习时长")
         elif choice == "2":
-            show_summary(df, "周", "每周学科学习时长", detailed=True)
+            show_summary("周", "每周学科学习时长", detailed=True)
         elif choice == "3":
-            show_summary(df, "月", "每月学科学习时长", detailed=True)
+            show_summary("月", "每月学科学习时长", detailed=True)
         elif choice == "4":
-            show_subject_summary(df)
+            show_subject_summary()
         elif choice == "5":
-            export_log_to_excel(df)
+            export_path = input(f"导出路径（.xlsx/.csv/.jsonl，留空使用 {EXPORT_PATH}）: ").strip() or EXPORT_PATH
+            start_date = input("开始日期 YYYY-MM-DD（留空表示不限）: ").strip() or None
+            end_date = input("结束日期 YYYY-MM-DD（留空表示不限）: ").strip() or None
+            export_log_to_excel(export_path, start_date, end_date)
         elif choice == "6":
             break
         else:
             print("❌ 无效选项，请重新输入！")
 
 
-def show_summary(df, group_by, title, detailed=False):
+def show_summary(group_by, title, detailed=False):
     if detailed:
-        summary = df.groupby([group_by, "日期", "学科"])["学习时长（分钟）"].sum().unstack().fillna(0)
+        summary = aggregate_log([group_by, "日期", "学科"]).unstack().fillna(0)
     else:
-        summary = df.groupby([group_by, "学科"])["学习时长（分钟）"].sum().unstack().fillna(0)
+        summary = aggregate_log([group_by, "学科"]).unstack().fillna(0)
 
     print(f"\n--- 📈 {title} ---")
     print(summary)
@@ -198,8 +625,8 @@ def show_summary(df, group_by, title, detailed=False):
     plt.show()
 
 
-def show_subject_summary(df):
-    summary = df.groupby("学科")["学习时长（分钟）"].sum().sort_values(ascending=False)
+def show_subject_summary():
+    summary = aggregate_log(["学科"]).sort_values(ascending=False)
     print("\n--- 📈 学科总学习时长分布 ---")
     print(summary)
 
@@ -210,25 +637,41 @@ def show_subject_summary(df):
     plt.show()
 
 
-def export_log_to_excel(df):
-    export_path = r'D:\study_progress\study_log.xlsx'
+def export_log_to_excel(export_path=None, start_date=None, end_date=None):
+    export_path = export_path or EXPORT_PATH
     try:
-        df.to_excel(export_path, index=False)
-        print(f"✅ 学习日志已成功导出到 {export_path}")
+        exported = export_study_logs(export_path, start_date, end_date, progress=print_export_progress)
+        print()
+        if exported == 0:
+            print("📭 没有找到符合条件的学习记录！")
+        else:
+            print(f"✅ 已导出 {exported} 条学习记录到 {export_path}")
     except Exception as e:
-        print(f"❌ 导出失败: {e}")
+        print(f"\n❌ 导出失败: {e}")
+
+
+def print_export_progress(exported, total):
+    if total:
+        print(f"\r📤 导出进度: {exported}/{total}（{exported / total:.0%}）", end="", flush=True)
+    else:
+        print(f"\r📤 已导出 {exported} 条", end="", flush=True)
 
 
 # ==================== 显示当前活动会话 ====================
-def display_active_sessions(active_sessions, active_sessions_lock):
+def display_active_sessions(active_sessions, active_sessions_lock, scheduler=None):
     with active_sessions_lock:
         if not active_sessions:
             print("当前没有正在进行的学习会话。")
         else:
             print("\n--- 当前活动学习会话 ---")
-            for file, times in active_sessions.items():
-                duration = (time.time() - times["start_time"]) / 60  # 分钟
+            for file, session in active_sessions.items():
+                duration = (time.time() - session.start_time) / 60  # 分钟
                 print(f"{file} | 已学习: {duration:.2f} 分钟")
+    if watcher_backend == "inotify":
+        print("🔍 监视方式: inotify（事件驱动）")
+    elif scheduler is not None:
+        print(f"🔍 当前扫描间隔: {scheduler.interval:.1f} 秒 | 上次扫描: {scheduler.last_scan_seconds * 1000:.0f} 毫秒"
+              f" | 扫描占用: {scheduler.duty_cycle:.1%}")
 
 
 # ==================== 主菜单 ====================
@@ -237,7 +680,9 @@ def main_menu():
     stop_event = threading.Event()
     active_sessions_lock = threading.Lock()
     active_sessions = {}
-    tracker_thread = threading.Thread(target=track_study_time, args=(stop_event, active_sessions_lock, active_sessions),
+    poll_scheduler = create_poll_scheduler()
+    tracker_thread = threading.Thread(target=track_study_time,
+                                      args=(stop_event, active_sessions_lock, active_sessions, poll_scheduler),
                                       daemon=True)
     tracker_thread.start()
 
@@ -252,19 +697,20 @@ def main_menu():
             if choice == "1":
                 generate_report()
             elif choice == "2":
-                display_active_sessions(active_sessions, active_sessions_lock)
+                display_active_sessions(active_sessions, active_sessions_lock, poll_scheduler)
             elif choice == "3":
                 print("🔴 停止跟踪并退出程序...")
                 stop_event.set()
                 tracker_thread.join()
                 # 处理退出时仍在进行的会话
                 with active_sessions_lock:
-                    for file, times in active_sessions.items():
-                        duration = (time.time() - times["start_time"]) / 60
+                    for file, session in active_sessions.items():
+                        duration = (time.time() - session.start_time) / 60
                         if duration >= LEARNING_THRESHOLD:
-                            log_study_time(file, times["start_time"], time.time())
+                            log_study_time(session, time.time())
                             print(
                                 f"🛑 退出时停止学习: {file} -> {duration:.2f} 分钟 于 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+                log_writer.flush()
                 break
             else:
                 print("❌ 无效选项，请重新输入！")
@@ -273,12 +719,13 @@ def main_menu():
         stop_event.set()
         tracker_thread.join()
         with active_sessions_lock:
-            for file, times in active_sessions.items():
-                duration = (time.time() - times["start_time"]) / 60
+            for file, session in active_sessions.items():
+                duration = (time.time() - session.start_time) / 60
                 if duration >= LEARNING_THRESHOLD:
-                    log_study_time(file, times["start_time"], time.time())
+                    log_study_time(session, time.time())
                     print(
                         f"🛑 中断时停止学习: {file} -> {duration:.2f} 分钟 于 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        log_writer.flush()
         print("✅ 程序已退出。")
 
 
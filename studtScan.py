@@ -0,0 +1,614 @@
+"""studtRecord.py 与 studtRecord——CMD.py 共用的文件扫描与会话调度组件。
+
+配置项仍定义在两个主程序中，由调用方在构造时传入。
+"""
+import os
+import sys
+import time
+import array
+import errno
+import heapq
+import select
+import struct
+import ctypes
+import ctypes.util
+import logging
+import threading
+import concurrent.futures
+
+
+# ==================== 文件注册表 ====================
+class FileRegistry:
+    """跟踪文件的紧凑存储：路径驻留为整数 ID，按 (目录 ID, 文件名) 保存，atime 存放在 array 列中。
+    文件名以文件系统编码的 bytes 保存（比中文 str 省一半以上内存），学科按目录计算一次，
+    记录学习时长时无需再拆分路径。"""
+
+    def __init__(self):
+        self.lock = threading.Lock()  # 多个根目录的扫描线程会同时登记文件
+        self.dir_ids = {}  # 目录路径 -> 目录 ID
+        self.dir_paths = []  # 目录 ID -> 目录路径
+        self.dir_subjects = []  # 目录 ID -> 学科（目录名）
+        self.dir_files = []  # 目录 ID -> array('I') 文件 ID
+        self.file_dirs = array.array("I")  # 文件 ID -> 目录 ID
+        self.names = []  # 文件 ID -> bytes 文件名，已释放的 ID 为 None
+        self.atimes = array.array("d")  # 文件 ID -> 最近一次观察到的 atime
+        self.free_ids = []
+
+    def __len__(self):
+        return len(self.names) - len(self.free_ids)
+
+    def intern_dir(self, path):
+        dir_id = self.dir_ids.get(path)
+        if dir_id is None:
+            with self.lock:
+                dir_id = self.dir_ids.get(path)
+                if dir_id is None:
+                    dir_id = len(self.dir_paths)
+                    self.dir_paths.append(path)
+                    self.dir_subjects.append(path.rsplit(os.sep, 1)[-1])
+                    self.dir_files.append(array.array("I"))
+                    self.dir_ids[path] = dir_id
+        return dir_id
+
+    def add(self, dir_id, name, atime):
+        with self.lock:
+            if self.free_ids:
+                file_id = self.free_ids.pop()
+                self.file_dirs[file_id] = dir_id
+                self.names[file_id] = name
+                self.atimes[file_id] = atime
+            else:
+                file_id = len(self.names)
+                self.file_dirs.append(dir_id)
+                self.names.append(name)
+                self.atimes.append(atime)
+            self.dir_files[dir_id].append(file_id)
+        return file_id
+
+    def add_path(self, path, atime):
+        directory, name = os.path.split(path)
+        return self.add(self.intern_dir(directory), os.fsencode(name), atime)
+
+    def lookup(self, path):
+        directory, name = os.path.split(path)
+        name = os.fsencode(name)
+        dir_id = self.dir_ids.get(directory)
+        if dir_id is not None:
+            for file_id in self.dir_files[dir_id]:
+                if self.names[file_id] == name:
+                    return file_id
+        return None
+
+    def remove(self, file_id):
+        """释放文件记录并返回其路径，ID 留待复用。"""
+        with self.lock:
+            path = self.path(file_id)
+            self.dir_files[self.file_dirs[file_id]].remove(file_id)
+            self.names[file_id] = None
+            self.free_ids.append(file_id)
+        return path
+
+    def remove_dir_files(self, dir_id):
+        with self.lock:
+            file_ids = self.dir_files[dir_id]
+            paths = [self.path(file_id) for file_id in file_ids]
+            for file_id in file_ids:
+                self.names[file_id] = None
+            self.free_ids.extend(file_ids)
+            self.dir_files[dir_id] = array.array("I")
+        return paths
+
+    def remove_tree(self, top):
+        prefix = top + os.sep
+        removed = []
+        for path, dir_id in list(self.dir_ids.items()):
+            if path == top or path.startswith(prefix):
+                removed.extend(self.remove_dir_files(dir_id))
+        return removed
+
+    def path(self, file_id):
+        return os.path.join(self.dir_paths[self.file_dirs[file_id]], os.fsdecode(self.names[file_id]))
+
+    def name(self, file_id):
+        return os.fsdecode(self.names[file_id])
+
+    def subject(self, file_id):
+        return self.dir_subjects[self.file_dirs[file_id]]
+
+
+class StudySession:
+    __slots__ = ("filename", "subject", "start_time", "last_fluctuation")
+
+    def __init__(self, filename, subject, start_time):
+        self.filename = filename
+        self.subject = subject
+        self.start_time = start_time
+        self.last_fluctuation = start_time
+
+
+# ==================== 增量目录扫描 ====================
+class IncrementalScanner:
+    """缓存目录索引，只重新列出 mtime 发生变化的目录；文件记录保存在共享的 FileRegistry 中。"""
+
+    # 目录 mtime 距今小于该值时不信任缓存（防止同一时间粒度内的二次修改被漏掉）
+    RACY_WINDOW = 2
+
+    def __init__(self, root_dir, extensions, registry=None):
+        self.root_dir = root_dir
+        # 以 bytes 路径遍历，文件名无需解码即可存入注册表
+        self.root_key = os.fsencode(root_dir)
+        self.extensions = tuple(os.fsencode(ext) for ext in extensions)
+        self.registry = FileRegistry() if registry is None else registry
+        # bytes 目录路径 -> (mtime_ns 或 None, 子目录列表, 注册表中的目录 ID)
+        self.dir_index = {}
+        self.relisted_dirs = 0  # 最近一次扫描中重新列出的目录数
+
+    def _list_dir(self, path):
+        subdirs, names, atimes = [], [], []
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir():
+                        # 与 os.walk 保持一致：不进入符号链接目录
+                        if not entry.is_symlink():
+                            subdirs.append(entry.path)
+                    elif entry.name.endswith(self.extensions):
+                        # Windows 下 DirEntry.stat() 直接使用目录枚举结果，无需额外系统调用
+                        atimes.append(entry.stat().st_atime)
+                        names.append(entry.name)
+                except OSError:
+                    continue
+        return subdirs, names, atimes
+
+    def diff(self):
+        """遍历目录树并更新注册表，返回 (新增文件 ID, atime 变化的文件 ID, 已删除的文件路径)，每个文件只 stat 一次。
+        文件只会在目录被重新列出、目录消失或缓存中的文件 stat 失败时被删除，无需与全量文件集合比对。"""
+        registry = self.registry
+        atimes = registry.atimes
+        added, changed, removed = [], [], []
+        visited = set()
+        now = time.time()
+        self.relisted_dirs = 0
+        pending = [self.root_key]
+        while pending:
+            path = pending.pop()
+            try:
+                dir_stat = os.stat(path)
+            except OSError:
+                continue
+            visited.add(path)
+            cached = self.dir_index.get(path)
+            if cached is None or cached[0] is None or cached[0] != dir_stat.st_mtime_ns:
+                try:
+                    subdirs, names, file_atimes = self._list_dir(path)
+                except OSError:
+                    if cached is not None:
+                        removed.extend(self.forget_dir(path))
+                    continue
+                self.relisted_dirs += 1
+                dir_id = registry.intern_dir(os.fsdecode(path))
+                previous = {registry.names[file_id]: file_id for file_id in registry.dir_files[dir_id]}
+                for name, atime in zip(names, file_atimes):
+                    file_id = previous.pop(name, None)
+                    if file_id is None:
+                        added.append(registry.add(dir_id, name, atime))
+                    elif atimes[file_id] != atime:
+                        atimes[file_id] = atime
+                        changed.append(file_id)
+                for file_id in previous.values():
+                    removed.append(registry.remove(file_id))
+                trusted = now - dir_stat.st_mtime > self.RACY_WINDOW
+                self.dir_index[path] = (dir_stat.st_mtime_ns if trusted else None, subdirs, dir_id)
+            else:
+                _, subdirs, dir_id = cached
+                missing = []
+                for file_id in registry.dir_files[dir_id]:
+                    try:
+                        atime = os.stat(os.path.join(path, registry.names[file_id])).st_atime
+                    except OSError:
+                        # 不只是 ENOENT：无权限、符号链接循环、I/O 错误等同样按文件已消失处理，不能中断本轮扫描
+                        missing.append(file_id)
+                        continue
+                    if atimes[file_id] != atime:
+                        atimes[file_id] = atime
+                        changed.append(file_id)
+                for file_id in missing:
+                    removed.append(registry.remove(file_id))
+            pending.extend(subdirs)
+
+        # 清理已经不存在的目录。visited 中可能有无法列出、从未建立索引的目录，不能只比较数量
+        for path in [p for p in self.dir_index if p not in visited]:
+            removed.extend(self.forget_dir(path))
+        return added, changed, removed
+
+    def forget_dir(self, path):
+        _, _, dir_id = self.dir_index.pop(path)
+        return self.registry.remove_dir_files(dir_id)
+
+
+# ==================== 会话超时调度 ====================
+class SessionExpiryQueue:
+    """按截止时间排序的最小堆。会话续期时不改动堆，到期弹出时再按最新的截止时间重新入堆。"""
+
+    def __init__(self, inactivity_threshold):
+        self.inactivity_threshold = inactivity_threshold  # 不活动超时时间（秒）
+        self.heap = []  # (截止时间, 文件路径, 会话开始时间)
+
+    def schedule(self, file, session):
+        heapq.heappush(self.heap, (session.last_fluctuation + self.inactivity_threshold, file, session.start_time))
+
+    def pop_expired(self, sessions, current_time):
+        """返回已超时的会话文件，调用方需持有会话锁。"""
+        expired = []
+        while self.heap and self.heap[0][0] < current_time:
+            _, file, start_time = heapq.heappop(self.heap)
+            session = sessions.get(file)
+            if session is None or session.start_time != start_time:
+                continue  # 会话已因文件删除等原因结束，或已被新的会话取代
+            if current_time - session.last_fluctuation > self.inactivity_threshold:
+                expired.append(file)
+            else:
+                self.schedule(file, session)
+        return expired
+
+
+# ==================== 自适应轮询 ====================
+class PollScheduler:
+    """空闲时轮询间隔指数退避到上限，检测到活动立即恢复快速轮询，并限制扫描占用的墙钟时间比例。"""
+
+    def __init__(self, min_interval, max_interval, backoff, duty_cycle_limit):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.duty_cycle_limit = duty_cycle_limit
+        self.interval = self.min_interval  # 当前生效的轮询间隔（秒）
+        self.scans = 0
+        self.last_scan_seconds = 0.0
+        self.scan_seconds = 0.0  # 累计扫描耗时（秒）
+        self.started_at = time.monotonic()
+
+    def next_interval(self, scan_seconds, active):
+        """记录一次扫描的耗时，返回下一次扫描前应等待的秒数。"""
+        self.scans += 1
+        self.last_scan_seconds = scan_seconds
+        self.scan_seconds += scan_seconds
+        if active:
+            interval = self.min_interval
+        else:
+            interval = min(self.interval * self.backoff, self.max_interval)
+        # 保证 扫描耗时 / (扫描耗时 + 等待时间) 不超过 duty_cycle_limit，必要时突破上限
+        budget = scan_seconds * (1 / self.duty_cycle_limit - 1)
+        self.interval = max(interval, budget)
+        return self.interval
+
+    @property
+    def duty_cycle(self):
+        """启动以来扫描耗时占墙钟时间的比例。"""
+        elapsed = time.monotonic() - self.started_at
+        return self.scan_seconds / elapsed if elapsed > 0 else 0.0
+
+
+# ==================== 多根目录并行扫描 ====================
+class MultiRootScanner:
+    """每个根目录一个增量扫描器，在有界线程池中并行扫描，各根目录独立超时。"""
+
+    def __init__(self, root_dirs, extensions, max_workers, timeout, timeouts=None, log=None):
+        self.root_dirs = list(dict.fromkeys(root_dirs))
+        # 所有根目录共用一个注册表，每个根目录的扫描任务只修改自己目录下的文件记录
+        self.registry = FileRegistry()
+        self.scanners = {root: IncrementalScanner(root, extensions, self.registry) for root in self.root_dirs}
+        self.timeout = timeout
+        self.timeouts = timeouts or {}  # 按根目录覆盖的超时
+        self.log = log or logging.log  # log(级别, 消息)，命令行版本改为 print
+        workers = max(1, min(max_workers, len(self.root_dirs)))
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scan")
+        self.pending = {}  # 根目录 -> 尚未取回结果的扫描任务
+        self.slow_roots = set()
+        self.baselined = set()  # 已完成首次扫描的根目录
+
+    def timeout_for(self, root):
+        return self.timeouts.get(root, self.timeout)
+
+    def root_of(self, path):
+        for root in self.root_dirs:
+            prefix = root if root.endswith(os.sep) else root + os.sep
+            if path == root or path.startswith(prefix):
+                return root
+        return None
+
+    def has_baseline(self, path):
+        """路径所在根目录的首次扫描是否已完成；不属于任何根目录的路径视为已完成。"""
+        root = self.root_of(path)
+        return root is None or root in self.baselined
+
+    def scan(self):
+        """首次扫描并返回共享的文件注册表；超时的根目录在之后的 diff() 或 collect_baselines() 中补齐。"""
+        self.diff()
+        return self.registry
+
+    def collect_baselines(self):
+        """不等待地取回已在后台完成的首次扫描（事件驱动模式下不再调用 diff），返回新完成基线的根目录。"""
+        ready = []
+        for root, future in list(self.pending.items()):
+            if root in self.baselined or not future.done():
+                continue
+            del self.pending[root]
+            try:
+                future.result()
+            except Exception as e:
+                self.log(logging.ERROR, f"扫描根目录失败 {root}: {e}")
+                self.pending[root] = self.executor.submit(self.scanners[root].diff)
+                continue
+            self.baselined.add(root)
+            self.slow_roots.discard(root)
+            ready.append(root)
+        return ready
+
+    def diff(self):
+        """并行扫描所有根目录，合并返回 (新增, atime 变化, 已删除)；超时的根目录本轮跳过。"""
+        start = time.monotonic()
+        submitted = set()
+        for root in self.root_dirs:
+            # 上一轮仍未完成的根目录不重复提交，慢速挂载最多占用一个工作线程
+            if root not in self.pending:
+                self.pending[root] = self.executor.submit(self.scanners[root].diff)
+                submitted.add(root)
+
+        added, changed, removed = [], [], []
+        for root in sorted(self.pending, key=self.timeout_for):
+            # 之前已超时的任务不再等待，只取回已经完成的结果
+            remaining = start + self.timeout_for(root) - time.monotonic() if root in submitted else 0
+            try:
+                root_added, root_changed, root_removed = self.pending[root].result(timeout=max(remaining, 0))
+            except concurrent.futures.TimeoutError:
+                if root not in self.slow_roots:
+                    self.slow_roots.add(root)
+                    self.log(logging.WARNING, f"扫描根目录超时，本轮跳过: {root}")
+                continue
+            except Exception as e:
+                self.log(logging.ERROR, f"扫描根目录失败 {root}: {e}")
+            else:
+                if root in self.baselined:
+                    added.extend(root_added)
+                    changed.extend(root_changed)
+                    removed.extend(root_removed)
+                else:
+                    # 首次完成的扫描（包括初始扫描超时后补齐的）只建立基线，不把整棵目录树报告为新增
+                    self.baselined.add(root)
+            del self.pending[root]
+            if root in submitted:
+                # 在超时内完成了一次完整扫描，之后再变慢时重新告警
+                self.slow_roots.discard(root)
+        return added, changed, removed
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+# ==================== 事件驱动文件监视 ====================
+class InotifyWatcher:
+    """基于 Linux inotify 的文件访问监视器，递归管理目录监视。
+    根目录的监视在扫描器的线程池中后台登记（watch_roots），挂起的网络挂载不会阻塞事件循环。"""
+
+    IN_ACCESS = 0x00000001
+    IN_OPEN = 0x00000020
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ONLYDIR = 0x01000000
+    IN_ISDIR = 0x40000000
+    IN_CLOEXEC = 0o2000000
+
+    WATCH_MASK = (IN_ACCESS | IN_OPEN | IN_MOVED_FROM | IN_MOVED_TO |
+                  IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_ONLYDIR)
+    EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+    READ_BUFFER_SIZE = 64 * 1024
+
+    def __init__(self, extensions, log=None):
+        self.extensions = tuple(extensions)
+        self.log = log or logging.log  # log(级别, 消息)，命令行版本改为 print
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = self.libc.inotify_init1(self.IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_init1 失败: {os.strerror(err)}")
+        self.watches = {}  # wd -> 目录路径
+        self.watch_paths = {}  # 目录路径 -> wd
+        self.scanner = None
+        self.root_walks = {}  # 根目录 -> 后台登记监视的任务
+        self.walk_started = {}  # 根目录 -> 任务提交时间
+        self.slow_roots = set()
+        self.watched_roots = set()  # 已完成监视登记的根目录
+
+    def watch_roots(self, scanner):
+        """根目录完成首次扫描后，在扫描器的线程池中遍历并添加监视；只登记，不等待。"""
+        self.scanner = scanner
+        self.attach_ready()
+
+    def attach_ready(self):
+        """提交已建立基线的根目录的遍历任务，把已完成的遍历结果并入监视表；在事件循环线程中调用。"""
+        if self.scanner is None:
+            return
+        for root in self.scanner.root_dirs:
+            # 与扫描相同的基线规则：首次扫描未完成的根目录暂不遍历，慢速挂载最多占用一个工作线程
+            if root in self.scanner.baselined and root not in self.root_walks and root not in self.watched_roots:
+                self.root_walks[root] = self.scanner.executor.submit(self.walk_tree, root)
+                self.walk_started[root] = time.monotonic()
+        for root, future in list(self.root_walks.items()):
+            if not future.done():
+                if root not in self.slow_roots and \
+                        time.monotonic() - self.walk_started[root] > self.scanner.timeout_for(root):
+                    self.slow_roots.add(root)
+                    self.log(logging.WARNING, f"登记目录监视超时，完成后再开始监视: {root}")
+                continue
+            del self.root_walks[root]
+            self.slow_roots.discard(root)
+            try:
+                added = future.result()
+            except Exception as e:
+                # 多半是超出 fs.inotify.max_user_watches，重试也不会成功
+                self.watched_roots.add(root)
+                self.log(logging.ERROR, f"无法监视根目录 {root}，其中的文件访问不会被记录: {e}")
+                continue
+            for wd, path in added:
+                self.register(wd, path)
+            self.watched_roots.add(root)
+            self.log(logging.INFO, f"开始监视根目录 {root}（{len(added)} 个目录）")
+
+    def add_watch(self, path):
+        """添加单个目录的监视并返回 wd，目录已消失或无权限时返回 None；不修改监视表，可在扫描线程中调用。"""
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), self.WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err in (errno.ENOENT, errno.ENOTDIR, errno.EACCES):
+                return None  # 目录已消失或无权限，跳过
+            # ENOSPC 表示超出 fs.inotify.max_user_watches
+            raise OSError(err, f"无法监视目录 {path}: {os.strerror(err)}")
+        return wd
+
+    def walk_tree(self, top):
+        # 返回 [(wd, 目录路径)]，由事件循环线程调用 register 并入监视表
+        added = []
+        for root, dirs, _ in os.walk(top):
+            wd = self.add_watch(root)
+            if wd is not None:
+                added.append((wd, root))
+        return added
+
+    def register(self, wd, path):
+        self.watches[wd] = path
+        self.watch_paths[path] = wd
+
+    def add_tree(self, top):
+        for wd, path in self.walk_tree(top):
+            self.register(wd, path)
+
+    def remove_tree(self, top):
+        prefix = top + os.sep
+        for path in [p for p in self.watch_paths if p == top or p.startswith(prefix)]:
+            wd = self.watch_paths.pop(path)
+            self.watches.pop(wd, None)
+            self.libc.inotify_rm_watch(self.fd, wd)
+
+    def read_events(self, timeout):
+        # 返回 [(类型, 路径)]，类型为 "access" / "created" / "removed"，同一批次内去重
+        self.attach_ready()
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        data = os.read(self.fd, self.READ_BUFFER_SIZE)
+        events = []
+        seen = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, name_len = self.EVENT_HEADER.unpack_from(data, offset)
+            offset += self.EVENT_HEADER.size
+            name = data[offset:offset + name_len].rstrip(b"\0")
+            offset += name_len
+
+            if mask & self.IN_Q_OVERFLOW:
+                self.log(logging.WARNING, "inotify 事件队列溢出，部分文件访问可能未被记录")
+                continue
+            if mask & self.IN_IGNORED:
+                path = self.watches.pop(wd, None)
+                if path is not None and self.watch_paths.get(path) == wd:
+                    del self.watch_paths[path]
+                continue
+            directory = self.watches.get(wd)
+            if directory is None or not name:
+                continue
+            path = os.path.join(directory, os.fsdecode(name))
+
+            if mask & self.IN_ISDIR:
+                if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                    self.add_tree(path)
+                elif mask & (self.IN_MOVED_FROM | self.IN_DELETE):
+                    self.remove_tree(path)
+                    events.append(("removed", path))
+                continue
+            if not path.endswith(self.extensions):
+                continue
+
+            if mask & (self.IN_DELETE | self.IN_MOVED_FROM):
+                kind = "removed"
+            elif mask & (self.IN_ACCESS | self.IN_OPEN):
+                kind = "access"
+            else:
+                kind = "created"
+            if (kind, path) not in seen:
+                seen.add((kind, path))
+                events.append((kind, path))
+        return events
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+def create_watcher(backend, scanner, extensions, log=None):
+    """按配置的监视后端（"auto" / "inotify" / "polling"）创建 inotify 监视器，需要改用轮询扫描时返回 None。
+    各根目录的监视在 scanner 的线程池中后台登记，事件循环可以立即开始。"""
+    log = log or logging.log
+    if backend == "polling":
+        return None
+    if not sys.platform.startswith("linux"):
+        if backend == "inotify":
+            log(logging.WARNING, "当前平台不支持 inotify，改用轮询扫描")
+        return None
+    try:
+        watcher = InotifyWatcher(extensions, log)
+    except (OSError, AttributeError) as e:
+        log(logging.WARNING, f"inotify 初始化失败，改用轮询扫描: {e}")
+        return None
+    log(logging.INFO, f"使用 inotify 监视 {len(scanner.root_dirs)} 个根目录")
+    watcher.watch_roots(scanner)
+    return watcher
+
+
+class WatchEventRouter:
+    """把监视器事件同步到文件注册表，再交给调用方结束或延续学习会话。
+    首次扫描尚未完成的根目录，其事件暂存到扫描完成后再处理，避免与后台扫描线程重复登记同一文件。"""
+
+    def __init__(self, scanner):
+        self.scanner = scanner
+        self.registry = scanner.registry
+        self.deferred = {}  # 每个文件只保留最后一个事件：文件 -> (事件类型, 发生时间)
+
+    def poll(self, watcher, timeout):
+        """等待一批事件，返回可以处理的 [(类型, 路径, 发生时间, 文件 ID)]；文件 ID 只对 "access" 有效。
+        返回前注册表已更新："removed" 的路径可能是文件也可能是整个目录，其下的文件都已移出注册表。"""
+        events = [(kind, file, time.time()) for kind, file in watcher.read_events(timeout)]
+        if self.scanner.pending and self.scanner.collect_baselines():
+            events = [(kind, file, t) for file, (kind, t) in self.deferred.items()] + events
+            self.deferred = {}
+        ready = []
+        for kind, file, event_time in events:
+            if not self.scanner.has_baseline(file):
+                self.deferred.pop(file, None)
+                self.deferred[file] = (kind, event_time)
+                continue
+            ready.append((kind, file, event_time, self.apply(kind, file, event_time)))
+        return ready
+
+    def apply(self, kind, file, event_time):
+        file_id = self.registry.lookup(file)
+        if kind == "access":
+            if file_id is None:
+                return self.registry.add_path(file, event_time)
+            self.registry.atimes[file_id] = event_time
+            return file_id
+        if kind == "created":
+            if file_id is None:
+                self.registry.add_path(file, event_time)
+        elif kind == "removed":
+            if file_id is not None:
+                self.registry.remove(file_id)
+            else:
+                # inotify 对整个目录的移出只产生一个事件
+                self.registry.remove_tree(file)
+        return None
@@ -0,0 +1,40 @@
+"""测试公共夹具：按文件路径加载两个主程序脚本。"""
+import importlib.util
+import os
+import sys
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GUI_SCRIPT = os.path.join(REPO_DIR, "studtRecord.py")
+CLI_SCRIPT = os.path.join(REPO_DIR, "studtRecord——CMD.py")
+sys.path.insert(0, REPO_DIR)
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+def load_module(path, name):
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope="session")
+def gui():
+    pytest.importorskip("PyQt5")
+    return load_module(GUI_SCRIPT, "studtRecord")
+
+
+@pytest.fixture(scope="session")
+def cli():
+    # 文件名中含有全角破折号，无法直接 import
+    return load_module(CLI_SCRIPT, "studtRecord_cmd")
+
+
+def write_file(path, content="x"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
@@ -0,0 +1,98 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+# (文件名, 学科, 开始时间, 时长秒数, 记录时间)；时长不是整分钟，CSV 后端会四舍五入到两位小数
+SESSIONS = [
+    ("函数.pdf", "数学", datetime(2026, 3, 2, 9, 0, 0), 2333, datetime(2026, 3, 2, 9, 40)),
+    ("极限.pptx", "数学", datetime(2026, 3, 2, 14, 5, 7), 61, datetime(2026, 3, 2, 14, 6)),
+    ("力学.pdf", "物理", datetime(2026, 3, 3, 20, 0, 0), 1000, datetime(2026, 3, 3, 20, 17)),
+    ("力学.pdf", "物理", datetime(2026, 3, 10, 8, 30, 0), 4567, datetime(2026, 3, 10, 9, 47)),
+    ("单词.docx", "英语", datetime(2026, 4, 1, 7, 0, 0), 125, datetime(2026, 4, 1, 7, 3)),
+]
+
+
+def fill(writer):
+    for filename, subject, start, seconds, logged_at in SESSIONS:
+        start_time = start.timestamp()
+        writer.append_session(filename, subject, start_time, start_time + seconds, logged_at)
+    writer.flush()
+    return writer
+
+
+@pytest.mark.parametrize("keys", [["日期"], ["周"], ["月"], ["学科"], ["日期", "学科"], ["月", "学科"]])
+def test_backends_aggregate_identically(cli, tmp_path, monkeypatch, keys):
+    csv_path = str(tmp_path / "study_log.csv")
+    monkeypatch.setattr(cli, "LOG_FILE", csv_path)
+    csv_log = fill(cli.StudyLogWriter(csv_path))
+    columnar_log = fill(cli.ColumnarStudyLog(str(tmp_path / "columns")))
+
+    monkeypatch.setattr(cli, "log_writer", csv_log)
+    expected = cli.aggregate_log(keys)
+    monkeypatch.setattr(cli, "log_writer", columnar_log)
+    actual = cli.aggregate_log(keys)
+
+    assert not expected.empty
+    pd.testing.assert_series_equal(actual, expected, check_exact=True, check_index_type=False)
+
+
+@pytest.mark.parametrize("backend", ["csv", "columnar"])
+def test_failed_flush_keeps_rows(cli, tmp_path, monkeypatch, backend):
+    if backend == "csv":
+        monkeypatch.setattr(cli, "LOG_FILE", str(tmp_path / "study_log.csv"))
+        writer = cli.StudyLogWriter(cli.LOG_FILE)
+    else:
+        writer = cli.ColumnarStudyLog(str(tmp_path / "columns"))
+    monkeypatch.setattr(cli, "log_writer", writer)
+    first, second = SESSIONS[:2], SESSIONS[2:]
+    write_rows = writer.write_rows
+
+    def locked(rows):
+        # 模拟 Excel 打开日志文件
+        raise PermissionError(13, "Permission denied")
+
+    monkeypatch.setattr(writer, "write_rows", locked)
+    for filename, subject, start, seconds, logged_at in first:
+        writer.append_session(filename, subject, start.timestamp(), start.timestamp() + seconds, logged_at)
+    with pytest.raises(PermissionError):
+        writer.flush()
+    writer.try_flush()
+    assert len(writer.buffer) == len(first)
+
+    monkeypatch.setattr(writer, "write_rows", write_rows)
+    for filename, subject, start, seconds, logged_at in second:
+        writer.append_session(filename, subject, start.timestamp(), start.timestamp() + seconds, logged_at)
+    assert writer.flush() == len(SESSIONS)
+    logged = cli.aggregate_log(["日期"])
+    assert logged.sum() == pytest.approx(sum(seconds for *_, seconds, _ in SESSIONS) / 60, abs=0.05)
+    assert writer.buffer == []
+
+
+@pytest.mark.parametrize("failing", [("dictionary", "subject"), ("column", "end_ms")])
+def test_columnar_log_recovers_from_partial_write(cli, tmp_path, monkeypatch, failing):
+    writer = fill(cli.ColumnarStudyLog(str(tmp_path / "columns")))
+    monkeypatch.setattr(cli, "log_writer", writer)
+    expected = cli.aggregate_log(["日期", "学科"])
+    kind, failing_name = failing
+    path_of = getattr(writer, f"{kind}_path")
+    blocked = tmp_path / "blocked"
+    blocked.mkdir()
+
+    # 目标换成目录，写入在前面的字典或列已追加之后失败
+    monkeypatch.setattr(writer, f"{kind}_path", lambda name: str(blocked) if name == failing_name else path_of(name))
+    start = datetime(2026, 5, 1, 8, 0).timestamp()
+    writer.append_session("新章节.pdf", "化学", start, start + 600, datetime(2026, 5, 1, 8, 10))
+    with pytest.raises(OSError):
+        writer.flush()
+    assert not writer.checked_tail
+
+    monkeypatch.setattr(writer, f"{kind}_path", path_of)
+    assert writer.flush() == 1
+    assert writer.row_count == len(SESSIONS) + 1
+    actual = cli.aggregate_log(["日期", "学科"])
+    assert actual[("2026-05-01", "化学")] == 10
+    pd.testing.assert_series_equal(actual.drop(("2026-05-01", "化学")), expected, check_index_type=False)
+    # 重新打开后字典与内存中的一致
+    reopened = cli.ColumnarStudyLog(writer.directory)
+    assert reopened.load_dictionaries() == writer.load_dictionaries()
@@ -0,0 +1,71 @@
+import sqlite3
+
+import pytest
+
+
+def study_row(user_id, minute):
+    start = f"2026-03-01 09:{minute:02d}:00"
+    return (user_id, "第一章.pdf", "数学", 1.0, "已完成", start, start, "2026-03-01", "08", "2026-03", start)
+
+
+@pytest.fixture
+def user_id(gui, tmp_path, monkeypatch):
+    monkeypatch.setattr(gui, "DB_PATH", str(tmp_path / "study.db"))
+    gui.initialize_database()
+    return gui.register_user("测试用户", "test@example.com")
+
+
+def logged_starts(gui):
+    conn = sqlite3.connect(gui.DB_PATH)
+    try:
+        return [row[0] for row in conn.execute("SELECT start_time FROM study_logs ORDER BY id")]
+    finally:
+        conn.close()
+
+
+def test_submit_does_not_block_when_queue_is_full(gui, user_id):
+    writer = gui.DatabaseWriter(gui.DB_PATH, queue_size=1)
+    # 写入线程尚未启动，队列放满后记录进入溢出缓冲区，提交方不等待
+    for minute in range(5):
+        writer.submit(study_row(user_id, minute))
+    assert len(writer.overflow) == 4
+    writer.start()
+    assert writer.flush(5)
+    writer.close()
+    assert logged_starts(gui) == [study_row(user_id, minute)[5] for minute in range(5)]
+
+
+def test_locked_batch_is_retried(gui, user_id, monkeypatch):
+    monkeypatch.setattr(gui, "DB_WRITE_RETRY_DELAY", 0.01)
+    update_trends = gui.update_trends
+    failures = []
+
+    def locked_once(conn, batch):
+        if not failures:
+            failures.append(batch)
+            raise sqlite3.OperationalError("database is locked")
+        update_trends(conn, batch)
+
+    monkeypatch.setattr(gui, "update_trends", locked_once)
+    writer = gui.DatabaseWriter(gui.DB_PATH)
+    writer.start()
+    writer.submit(study_row(user_id, 0))
+    writer.submit(study_row(user_id, 1))
+    assert writer.flush(5)
+    writer.close()
+    assert len(failures) == 1
+    # 失败的事务已回滚，重试后每条记录只写入一次
+    assert len(logged_starts(gui)) == 2
+    assert writer.dropped_rows == 0
+
+
+def test_unrecoverable_batch_is_dropped_and_logged(gui, user_id, caplog):
+    writer = gui.DatabaseWriter(gui.DB_PATH)
+    writer.start()
+    writer.submit(study_row(user_id, 0)[:10])  # 少一列，绑定参数个数不符
+    assert writer.flush(5)
+    writer.submit(study_row(user_id, 1))
+    writer.close()
+    assert writer.dropped_rows == 1
+    assert "未写入的学习记录" in caplog.text
+    assert len(logged_starts(gui)) == 1
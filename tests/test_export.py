@@ -0,0 +1,55 @@
+import csv
+import os
+
+import pytest
+
+import studtExport
+
+COLUMNS = ["文件名", "学科", "学习时长（分钟）"]
+ROWS = [("函数.pdf", "数学", 38.88), ("力学.pdf", "物理", 16.67)]
+
+
+def test_write_export_replaces_target(tmp_path):
+    path = str(tmp_path / "export.csv")
+    progress = []
+    assert studtExport.write_export(path, COLUMNS, [ROWS[:1], [], ROWS[1:]], 2,
+                                    lambda done, total: progress.append((done, total))) == 2
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        assert list(csv.reader(f)) == [COLUMNS] + [[str(value) for value in row] for row in ROWS]
+    assert progress == [(1, 2), (2, 2)]
+    assert os.listdir(tmp_path) == ["export.csv"]
+
+
+def test_write_export_without_rows_creates_nothing(tmp_path):
+    assert studtExport.write_export(str(tmp_path / "export.jsonl"), COLUMNS, [[], []]) == 0
+    assert os.listdir(tmp_path) == []
+
+
+def test_unsupported_format(tmp_path):
+    with pytest.raises(ValueError):
+        studtExport.write_export(str(tmp_path / "export.txt"), COLUMNS, [ROWS])
+
+
+class FailingCloseWriter(studtExport.CsvExportWriter):
+    def close(self):
+        super().close()
+        raise OSError("磁盘已满")
+
+
+def test_close_error_removes_temp_file(tmp_path, monkeypatch):
+    monkeypatch.setitem(studtExport.EXPORT_WRITERS, ".csv", FailingCloseWriter)
+    with pytest.raises(OSError, match="磁盘已满"):
+        studtExport.write_export(str(tmp_path / "export.csv"), COLUMNS, [ROWS])
+    assert os.listdir(tmp_path) == []
+
+
+def test_chunk_error_is_not_masked_by_cleanup(tmp_path, monkeypatch):
+    monkeypatch.setitem(studtExport.EXPORT_WRITERS, ".csv", FailingCloseWriter)
+
+    def chunks():
+        yield ROWS
+        raise RuntimeError("读取中断")
+
+    with pytest.raises(RuntimeError, match="读取中断"):
+        studtExport.write_export(str(tmp_path / "export.csv"), COLUMNS, chunks())
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,34 @@
+import sqlite3
+
+import pytest
+
+
+def study_row(user_id, day, duration):
+    date = f"2026-03-{day:02d}"
+    return (user_id, "第一章.pdf", "数学", duration, "已完成", f"{date} 09:00:00", f"{date} 10:00:00",
+            date, "09", "2026-03", f"{date} 10:00:00")
+
+
+def test_batch_forecast_skips_days_without_study_like_trend_model(gui, tmp_path, monkeypatch):
+    monkeypatch.setattr(gui, "DB_PATH", str(tmp_path / "study.db"))
+    gui.initialize_database()
+    user_id = gui.register_user("测试用户", "test@example.com")
+    writer = gui.DatabaseWriter(gui.DB_PATH)
+    writer.start()
+    # 中间有几天没有学习，不能按 0 分钟参与拟合
+    for day, duration in [(1, 30), (2, 45), (5, 60), (9, 90)]:
+        writer.submit(study_row(user_id, day, duration))
+    writer.close()
+
+    result = gui.forecast_all_series(horizon=3)
+    conn = sqlite3.connect(gui.DB_PATH)
+    try:
+        slope, intercept = gui.TrendModel.load(conn, user_id).fit()
+    finally:
+        conn.close()
+    assert list(result.user_ids) == [user_id]
+    assert list(result.subjects) == ["数学"]
+    assert result.slopes[0] == pytest.approx(slope)
+    assert result.intercepts[0] == pytest.approx(intercept)
+    assert result.start_date.strftime("%Y-%m-%d") == "2026-03-10"
+    assert result.forecasts[0] == pytest.approx([intercept + slope * x for x in (9, 10, 11)])
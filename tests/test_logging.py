@@ -0,0 +1,47 @@
+import atexit
+import json
+import logging
+
+import pytest
+
+
+@pytest.fixture
+def root_logger():
+    # setup_logging 会替换根日志器的处理器，测试结束后恢复
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    yield root
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+
+
+def log_through_queue(gui, tmp_path, log_format):
+    path = tmp_path / f"study_tracker.{log_format}.log"
+    listener = gui.setup_logging(log_format, str(path))
+    try:
+        logging.info("开始学习: %s", "第一章.pdf")
+        try:
+            1 / 0
+        except ZeroDivisionError:
+            logging.exception("统计学习时长时出错")
+    finally:
+        listener.stop()
+        atexit.unregister(listener.stop)
+    return path.read_text(encoding="utf-8")
+
+
+def test_jsonl_keeps_tracebacks(gui, tmp_path, root_logger):
+    entries = [json.loads(line) for line in log_through_queue(gui, tmp_path, "jsonl").splitlines()]
+    assert [entry["message"] for entry in entries] == ["开始学习: 第一章.pdf", "统计学习时长时出错"]
+    assert "exc_info" not in entries[0]
+    assert entries[1]["level"] == "ERROR"
+    assert "ZeroDivisionError: division by zero" in entries[1]["exc_info"]
+
+
+def test_text_log_keeps_tracebacks(gui, tmp_path, root_logger):
+    text = log_through_queue(gui, tmp_path, "text")
+    assert " - ERROR - 统计学习时长时出错\nTraceback (most recent call last):" in text
+    assert "ZeroDivisionError: division by zero" in text
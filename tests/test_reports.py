@@ -0,0 +1,70 @@
+import gc
+import os
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+
+def study_row(user_id, day, duration):
+    start = datetime(2026, 3, day, 9, 0)
+    end = start + timedelta(minutes=duration)
+    return (
+        user_id, "第一章.pdf", "数学", duration, "已完成",
+        start.strftime("%Y-%m-%d %H:%M:%S"), end.strftime("%Y-%m-%d %H:%M:%S"), start.strftime("%Y-%m-%d"),
+        start.strftime("%U"), start.strftime("%Y-%m"), end.strftime("%Y-%m-%d %H:%M:%S"),
+    )
+
+
+@pytest.fixture
+def window(gui, tmp_path, monkeypatch):
+    monkeypatch.setattr(gui, "DB_PATH", str(tmp_path / "study.db"))
+    gui.initialize_database()
+    user_id = gui.register_user("测试用户", "test@example.com")
+    writer = gui.DatabaseWriter(gui.DB_PATH)
+    writer.start()
+    for day in range(1, 11):
+        writer.submit(study_row(user_id, day, 30 + day))
+    writer.close()
+
+    messages = []
+    monkeypatch.setattr(gui.QMessageBox, "information", lambda *args, **kwargs: messages.append(args[1:]))
+    monkeypatch.setattr(gui.QMessageBox, "warning", lambda *args, **kwargs: messages.append(args[1:]))
+    app = gui.QApplication.instance() or gui.QApplication([])
+    win = gui.StudyTrackerApp()
+    win.current_user = {"id": user_id, "username": "测试用户", "theme": "Light"}
+    win.create_main_menu()
+    win.messages = messages
+    win.settle = lambda: settle(app, win)
+    yield win
+    win.cleanup()
+
+
+def settle(app, win):
+    # 等线程池任务结束，再处理排队到界面线程的信号
+    win.report_pool.waitForDone()
+    for _ in range(5):
+        app.processEvents()
+        time.sleep(0.02)
+
+
+def test_export_after_report(gui, window, tmp_path, monkeypatch):
+    window.show_summary("date", "每日学习时长")
+    window.show_subject_summary()
+    window.settle()
+    assert window.reports_running == 0
+    # 线程池已删除运行完的任务，回收其 Python 包装对象后再导出
+    gc.collect()
+
+    path = str(tmp_path / "export.csv")
+    monkeypatch.setattr(gui.QFileDialog, "getSaveFileName", staticmethod(lambda *args, **kwargs: (path, "")))
+    progress = []
+    window.report_progressed = lambda done, total: progress.append((done, total))
+    window.export_log_to_excel()
+    window.settle()
+    assert window.reports_running == 0
+    assert os.path.exists(path)
+    with open(path, encoding="utf-8-sig") as f:
+        assert len(f.read().splitlines()) == 11
+    assert window.messages[-1][0] == "成功"
+    assert progress[-1] == (10, 10)
@@ -0,0 +1,229 @@
+import errno
+import os
+import shutil
+import sys
+import threading
+
+import pytest
+
+import studtScan
+from conftest import write_file
+
+
+def make_scanner(root):
+    scanner = studtScan.IncrementalScanner(str(root), [".pdf"])
+    # 测试中刚创建的目录也信任其 mtime 缓存
+    scanner.RACY_WINDOW = float("-inf")
+    return scanner
+
+
+def test_removed_dir_detected_next_to_unlistable_dir(tmp_path, monkeypatch):
+    write_file(str(tmp_path / "gone" / "a.pdf"))
+    (tmp_path / "locked").mkdir()
+    scanner = make_scanner(tmp_path)
+    list_dir = scanner._list_dir
+
+    def deny_locked(path):
+        if path.endswith(b"locked"):
+            raise PermissionError(errno.EACCES, "denied")
+        return list_dir(path)
+
+    monkeypatch.setattr(scanner, "_list_dir", deny_locked)
+    added, _, _ = scanner.diff()
+    assert len(added) == 1
+
+    shutil.rmtree(tmp_path / "gone")
+    _, _, removed = scanner.diff()
+    assert removed == [str(tmp_path / "gone" / "a.pdf")]
+    assert os.fsencode(str(tmp_path / "gone")) not in scanner.dir_index
+    assert len(scanner.registry) == 0
+
+
+def test_stat_errors_in_cached_dirs_do_not_abort_diff(tmp_path, monkeypatch):
+    write_file(str(tmp_path / "a" / "1.pdf"))
+    write_file(str(tmp_path / "b" / "2.pdf"))
+    scanner = make_scanner(tmp_path)
+    scanner.diff()
+
+    # 删除文件后恢复目录 mtime，使扫描器走缓存分支
+    dir_a = tmp_path / "a"
+    mtime_ns = os.stat(dir_a).st_mtime_ns
+    os.remove(dir_a / "1.pdf")
+    os.utime(dir_a, ns=(mtime_ns, mtime_ns))
+
+    stat = os.stat
+    denied = os.fsencode(str(tmp_path / "b" / "2.pdf"))
+
+    def failing_stat(path, *args, **kwargs):
+        if os.fsencode(path) == denied:
+            raise OSError(errno.EIO, "I/O error")
+        return stat(path, *args, **kwargs)
+
+    monkeypatch.setattr(studtScan.os, "stat", failing_stat)
+    _, _, removed = scanner.diff()
+    assert sorted(removed) == [str(dir_a / "1.pdf"), str(tmp_path / "b" / "2.pdf")]
+
+
+def gate_root(monkeypatch, slow_root, gate):
+    """让指定根目录的扫描阻塞到 gate 被设置。"""
+    diff = studtScan.IncrementalScanner.diff
+
+    def gated_diff(self):
+        if self.root_dir == slow_root:
+            gate.wait(5)
+        return diff(self)
+
+    monkeypatch.setattr(studtScan.IncrementalScanner, "diff", gated_diff)
+
+
+def test_late_initial_scan_is_a_silent_baseline(tmp_path, monkeypatch):
+    fast, slow = str(tmp_path / "fast"), str(tmp_path / "slow")
+    write_file(os.path.join(fast, "数学", "a.pdf"))
+    write_file(os.path.join(slow, "物理", "b.pdf"))
+    gate = threading.Event()
+    gate_root(monkeypatch, slow, gate)
+    scanner = studtScan.MultiRootScanner([fast, slow], [".pdf"], 2, 5, {slow: 0.05}, log=lambda *a: None)
+    try:
+        registry = scanner.scan()
+        assert len(registry) == 1
+        assert scanner.has_baseline(os.path.join(fast, "数学", "a.pdf"))
+        assert not scanner.has_baseline(os.path.join(slow, "物理", "b.pdf"))
+
+        gate.set()
+        scanner.pending[slow].result(5)
+        added, changed, removed = scanner.diff()
+        assert (added, changed, removed) == ([], [], [])
+        assert len(registry) == 2
+        assert scanner.has_baseline(os.path.join(slow, "物理", "b.pdf"))
+
+        write_file(os.path.join(slow, "物理", "c.pdf"))
+        added, _, _ = scanner.diff()
+        assert [registry.path(file_id) for file_id in added] == [os.path.join(slow, "物理", "c.pdf")]
+    finally:
+        gate.set()
+        scanner.close()
+
+
+class ScriptedWatcher:
+    """按批次返回预设事件的监视器，事件用完后停止跟踪线程。"""
+
+    def __init__(self, batches, stop_event, before_batch=None):
+        self.batches = list(batches)
+        self.stop_event = stop_event
+        self.before_batch = before_batch or (lambda index: None)
+        self.index = 0
+
+    def read_events(self, timeout):
+        if self.index >= len(self.batches):
+            self.stop_event.set()
+            return []
+        self.index += 1
+        self.before_batch(self.index - 1)
+        return self.batches[self.index - 1]
+
+    def close(self):
+        pass
+
+
+def test_watch_events_wait_for_root_baseline(gui, tmp_path, monkeypatch):
+    root = str(tmp_path / "slow")
+    path = os.path.join(root, "数学", "a.pdf")
+    write_file(path)
+    gate = threading.Event()
+    gate_root(monkeypatch, root, gate)
+    for name, value in [("ROOT_DIRS", [root]), ("ROOT_SCAN_TIMEOUT", 0.05), ("ROOT_SCAN_TIMEOUTS", {}),
+                        ("DB_PATH", str(tmp_path / "study.db"))]:
+        monkeypatch.setattr(gui, name, value)
+    stop_event = threading.Event()
+    tracker = gui.StudyTracker(1, stop_event, lambda *a: None, lambda *a: None)
+    try:
+        assert len(tracker.all_files) == 0
+
+        registered_during_scan = []
+
+        def release_scan(index):
+            # 第一批事件在扫描完成前到达，第二批之前扫描完成
+            if index == 1:
+                registered_during_scan.append(len(tracker.all_files))
+                gate.set()
+                tracker.scanner.pending[root].result(5)
+
+        watcher = ScriptedWatcher([[("access", path)], []], stop_event, release_scan)
+        tracker.run_event_loop(watcher)
+        # 扫描期间事件不得登记到注册表，否则会与扫描线程重复登记
+        assert registered_during_scan == [0]
+        assert len(tracker.all_files) == 1
+        assert list(tracker.active_sessions) == [path]
+    finally:
+        gate.set()
+        tracker.scanner.close()
+        tracker.db_writer.close()
+
+
+def test_cli_watch_events_start_and_end_sessions(cli, tmp_path, monkeypatch):
+    root = str(tmp_path / "root")
+    path = os.path.join(root, "数学", "第一章", "a.pdf")
+    write_file(path)
+    writer = cli.StudyLogWriter(str(tmp_path / "study_log.csv"), flush_size=1)
+    monkeypatch.setattr(cli, "log_writer", writer)
+    monkeypatch.setattr(cli, "LEARNING_THRESHOLD", 0)
+    scanner = studtScan.MultiRootScanner([root], [".pdf"], 1, 5, log=lambda *a: None)
+    stop_event = threading.Event()
+    lock, sessions, started = threading.Lock(), {}, []
+
+    def check(index):
+        if index == 1:
+            started.extend(sessions)
+
+    # 整个学科目录被移走时只有一个事件，目录下的会话都要结束
+    watcher = ScriptedWatcher([[("access", path)], [("removed", os.path.join(root, "数学"))]], stop_event, check)
+    try:
+        scanner.scan()
+        cli.watch_study_time(watcher, scanner, studtScan.SessionExpiryQueue(300), stop_event, lock, sessions)
+    finally:
+        scanner.close()
+    assert started == [path]
+    assert sessions == {}
+    assert len(scanner.registry) == 0
+    with open(writer.path, encoding="utf-8") as f:
+        assert f.read().splitlines()[1].startswith("a.pdf,第一章,")
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="需要 inotify")
+def test_inotify_watches_attach_per_root(tmp_path, monkeypatch):
+    fast, slow = str(tmp_path / "fast"), str(tmp_path / "slow")
+    fast_file, slow_file = os.path.join(fast, "数学", "a.pdf"), os.path.join(slow, "物理", "b.pdf")
+    write_file(fast_file)
+    write_file(slow_file)
+    gate = threading.Event()
+    gate_root(monkeypatch, slow, gate)
+    scanner = studtScan.MultiRootScanner([fast, slow], [".pdf"], 2, 5, {slow: 0.05}, log=lambda *a: None)
+    watcher = None
+    try:
+        scanner.scan()
+        # 慢速根目录的首次扫描仍挂起，监视器照样立即返回
+        watcher = studtScan.create_watcher("inotify", scanner, [".pdf"], log=lambda *a: None)
+        assert watcher is not None
+        assert slow not in watcher.root_walks
+
+        def read_until(path):
+            for _ in range(50):
+                with open(path) as f:
+                    f.read()
+                if ("access", path) in watcher.read_events(0.1):
+                    return True
+            return False
+
+        assert read_until(fast_file)
+        assert slow not in watcher.watched_roots
+
+        gate.set()
+        scanner.pending[slow].result(5)
+        scanner.collect_baselines()
+        assert read_until(slow_file)
+        assert watcher.watched_roots == {fast, slow}
+    finally:
+        gate.set()
+        if watcher is not None:
+            watcher.close()
+        scanner.close()